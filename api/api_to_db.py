@@ -1,30 +1,512 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import jwt
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import os
+import re
+import json
+import base64
+import hashlib
+import time
+import asyncio
+import atexit
+import codecs
+import csv
+import logging
+import logging.handlers
+import multiprocessing
+import queue
+import random
+import socket
+import tempfile
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import combinations
 from passlib.context import CryptContext
+from bson import decode_file_iter
+from bson.errors import InvalidBSON
 from bson.objectid import ObjectId
+from pymongo import monitoring
+from pymongo import ASCENDING, DESCENDING, DeleteMany, DeleteOne, InsertOne, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, PyMongoError
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+# Dépendances optionnelles : sérialisation JSON native et compression brotli
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+# Export colonnaire Arrow / Parquet
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Analyse du graphe de collaborations
+try:
+    import networkx as nx
+except ImportError:
+    nx = None
+
+# Noms de pays (stats_pays) à partir des codes ISO des institutions
+try:
+    import pycountry
+except ImportError:
+    pycountry = None
+
+try:
+    import numpy as np
+    import scipy.sparse as sp
+    from scipy.sparse.csgraph import connected_components
+except ImportError:
+    sp = None
+
+# Journalisation structurée : une ligne JSON par événement, écrite par un thread dédié
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Fraction des événements DEBUG du chemin chaud (authentification) effectivement écrits
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+
+class JSONLogFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.utcfromtimestamp(record.created).isoformat(timespec="milliseconds") + "Z",
+            "level": record.levelname,
+            "event": record.getMessage(),
+            **getattr(record, "fields", {}),
+        }
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+logger = logging.getLogger("api")
+logger.setLevel(LOG_LEVEL)
+logger.propagate = False
+log_queue = queue.SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(log_queue))
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(JSONLogFormatter())
+log_listener = logging.handlers.QueueListener(log_queue, log_handler)
+log_listener.start()
+# Vide la file des événements en attente à l'arrêt du processus
+atexit.register(log_listener.stop)
+
+def log(level: int, event: str, sample: Optional[float] = None, **fields):
+    """Écrit `event` avec ses champs ; ne coûte qu'un test de niveau quand il est désactivé.
+
+    `sample` : fraction des appels journalisés (événements fréquents).
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if sample is not None and random.random() >= sample:
+        return
+    logger.log(level, event, extra={"fields": fields})
+
+# Métriques au format d'exposition Prometheus (/metrics)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+COUNT_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+class MetricsRegistry:
+    """Compteurs, jauges et histogrammes étiquetés, partagés entre la boucle et les threads Motor."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def register(self, name: str, kind: str, help: str, buckets: tuple = ()):
+        self._metrics[name] = {"kind": kind, "help": help, "buckets": buckets, "series": {}}
+
+    def inc(self, name: str, labels: tuple = (), value: float = 1):
+        with self._lock:
+            series = self._metrics[name]["series"]
+            series[labels] = series.get(labels, 0) + value
+
+    def set(self, name: str, value: float, labels: tuple = ()):
+        with self._lock:
+            self._metrics[name]["series"][labels] = value
+
+    def observe(self, name: str, value: float, labels: tuple = ()):
+        metric = self._metrics[name]
+        with self._lock:
+            series = metric["series"].get(labels)
+            if series is None:
+                series = metric["series"][labels] = [[0] * len(metric["buckets"]), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(metric["buckets"]):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def value(self, name: str, labels: tuple = ()):
+        """Valeur courante d'une série ; (nombre, somme) pour un histogramme."""
+        metric = self._metrics[name]
+        with self._lock:
+            series = metric["series"].get(labels)
+            if metric["kind"] == "histogram":
+                return (series[2], series[1]) if series else (0, 0.0)
+            return series or 0
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, metric in self._metrics.items():
+                lines.append(f"# HELP {name} {metric['help']}")
+                lines.append(f"# TYPE {name} {metric['kind']}")
+                for labels, value in sorted(metric["series"].items()):
+                    if metric["kind"] != "histogram":
+                        lines.append(f"{name}{format_labels(labels)} {value}")
+                        continue
+                    counts, total, count = value
+                    cumulative = 0
+                    for bound, bucket_count in zip(metric["buckets"], counts):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{format_labels(labels + (('le', bound),))} {cumulative}")
+                    lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {count}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {total}")
+                    lines.append(f"{name}_count{format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+def format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+metrics = MetricsRegistry()
+metrics.register("http_requests_total", "counter", "Requêtes HTTP traitées")
+metrics.register("http_request_duration_seconds", "histogram", "Durée des requêtes HTTP", LATENCY_BUCKETS)
+metrics.register("http_response_size_bytes", "histogram", "Taille des réponses HTTP (après compression)", SIZE_BUCKETS)
+metrics.register("http_requests_in_flight", "gauge", "Requêtes HTTP en cours")
+metrics.register("mongo_command_duration_seconds", "histogram", "Durée des commandes MongoDB", LATENCY_BUCKETS)
+metrics.register("mongo_documents_returned", "histogram", "Documents renvoyés par commande MongoDB", COUNT_BUCKETS)
+metrics.register("mongo_command_failures_total", "counter", "Commandes MongoDB en échec")
+metrics.register("bcrypt_duration_seconds", "histogram", "Durée d'un calcul bcrypt", LATENCY_BUCKETS)
+metrics.register("bcrypt_wait_seconds", "histogram", "Durée d'un calcul bcrypt, attente dans la file comprise", LATENCY_BUCKETS)
+metrics.register("bcrypt_rejected_total", "counter", "Connexions refusées (file bcrypt pleine)")
+metrics.register("bcrypt_pending", "gauge", "Calculs bcrypt en cours ou en attente")
+metrics.register("response_cache_entries", "gauge", "Réponses en cache")
+metrics.register("response_cache_bytes", "gauge", "Taille des réponses en cache")
+metrics.set("http_requests_in_flight", 0)
+
+# Commandes dont le premier argument n'est pas le nom de la collection
+MONGO_COLLECTION_ARGUMENT = {"getMore": "collection"}
+
+class CommandMetrics(monitoring.CommandListener):
+    """Temps par commande et documents renvoyés, par collection (appelé depuis les threads de pymongo)."""
+
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        argument = MONGO_COLLECTION_ARGUMENT.get(event.command_name, event.command_name)
+        collection = event.command.get(argument)
+        self._collections[(event.connection_id, event.request_id)] = collection if isinstance(collection, str) else ""
+
+    def succeeded(self, event):
+        labels = self.labels(event)
+        metrics.observe("mongo_command_duration_seconds", event.duration_micros / 1e6, labels)
+        cursor = event.reply.get("cursor") if isinstance(event.reply, dict) else None
+        if isinstance(cursor, dict):
+            batch = cursor.get("firstBatch", cursor.get("nextBatch", ()))
+            metrics.observe("mongo_documents_returned", len(batch), labels)
+
+    def failed(self, event):
+        labels = self.labels(event)
+        metrics.observe("mongo_command_duration_seconds", event.duration_micros / 1e6, labels)
+        metrics.inc("mongo_command_failures_total", labels)
+
+    def labels(self, event) -> tuple:
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        return (("collection", collection), ("command", event.command_name))
 
 # MongoDB config
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://mongo:27017/research_db_structure")
-client = AsyncIOMotorClient(MONGO_URI)
+MONGO_DATABASE = "research_db_structure"
+# Pool de connexions de chaque worker (ces valeurs priment sur les options de MONGO_URI)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "20000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0")) or None  # 0 : pas de limite
+# Lectures servies au dashboard (listes, agrégations, recherche, graphe) : primary,
+# primaryPreferred, secondary, secondaryPreferred ou nearest. Écritures, utilisateurs
+# et état interne restent sur le primaire.
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+MONGO_MAX_STALENESS_SECONDS = int(os.getenv("MONGO_MAX_STALENESS_SECONDS", "-1"))  # -1 : sans limite, sinon >= 90
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
 
-# Log de débogage pour l'URI MongoDB
-print(f"Connecting to MongoDB at: {MONGO_URI}")
-db = client["research_db_structure"]
+def read_preference(mode: str):
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"MONGO_READ_PREFERENCE invalide: {mode}")
+    if mode == "primary":
+        return Primary()
+    return READ_PREFERENCES[mode](max_staleness=MONGO_MAX_STALENESS_SECONDS)
+
+# Client créé par chaque worker dans son hook de démarrage (jamais partagé à travers un fork)
+client: Optional[AsyncIOMotorClient] = None
+db = None
+read_db = None
+# Identifiant du processus pour le bail du matérialiseur (fixé au démarrage du worker)
+worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+def connect_mongo():
+    global client, db, read_db, worker_id
+    if client is not None:
+        return
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    client = AsyncIOMotorClient(
+        MONGO_URI,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+        event_listeners=[CommandMetrics()] if METRICS_ENABLED else [],
+    )
+    db = client[MONGO_DATABASE]
+    read_db = client.get_database(MONGO_DATABASE, read_preference=read_preference(MONGO_READ_PREFERENCE))
+    log(logging.INFO, "mongo_connecting", uri=re.sub(r"//[^@/]*@", "//***@", MONGO_URI), worker=worker_id,
+        max_pool_size=MONGO_MAX_POOL_SIZE, read_preference=MONGO_READ_PREFERENCE)
 
 # JWT config - read from environment variables
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "supersecretkey")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Pagination config - taille maximale d'une page pour les endpoints de liste
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+# Nombre de documents lus par aller-retour Motor en mode streaming
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+COLUMNAR_MEDIA_TYPES = {"arrow": ARROW_MEDIA_TYPE, "parquet": PARQUET_MEDIA_TYPE}
+
+# Tableau imbriqué éclaté en une ligne par élément dans l'export colonnaire
+COLUMNAR_EXPLODE = {"chercheurs": "publications", "publications": "auteurs"}
+# Champs `annee` normalisés en entier (ils mélangent chaînes et flottants dans la base)
+COLUMNAR_YEAR_FIELDS = {"annee", "publications.annee"}
+# Noms répétés d'une ligne à l'autre : colonnes dictionnaire (table des valeurs + indices entiers)
+COLUMNAR_DICTIONARY_FIELDS = {"nom", "pays", "type", "auteurs", "chercheur1", "chercheur2"}
+
+# Utilisateurs autorisés à appeler les endpoints /api/admin (séparés par des virgules)
+ADMIN_USERS = {name.strip() for name in os.getenv("ADMIN_USERS", "").split(",") if name.strip()}
+# Création des index au démarrage (désactivable si les index sont gérés ailleurs)
+ENSURE_INDEXES = os.getenv("ENSURE_INDEXES", "1") == "1"
+
+# Index requis par les requêtes de l'API : collection -> [(clés, options)]
+INDEX_SPECS = {
+    "users": [([("username", ASCENDING)], {"unique": True})],
+    "chercheurs": [
+        ([("nom", ASCENDING)], {"unique": True}),
+        ([("institutions", ASCENDING)], {}),
+        ([("publications.annee", ASCENDING)], {}),
+    ],
+    "publications": [
+        ([("annee", ASCENDING)], {}),
+        ([("auteurs", ASCENDING)], {}),
+        ([("titre", ASCENDING)], {}),
+        ([("institutions", ASCENDING)], {}),
+        ([("citations", DESCENDING)], {}),
+        # Recherche plein texte : mots exacts, insensible à la casse et aux accents
+        ([("titre", "text"), ("auteurs", "text"), ("institutions", "text")], {"default_language": "none"}),
+    ],
+    "institutions": [
+        ([("nom", ASCENDING)], {}),
+        ([("pays", ASCENDING)], {}),
+    ],
+    "stats_pays": [
+        ([("annee", ASCENDING), ("pays", ASCENDING)], {}),
+        ([("pays", ASCENDING)], {}),
+    ],
+    "collaborations": [
+        ([("chercheur1", ASCENDING)], {}),
+        ([("chercheur2", ASCENDING)], {}),
+    ],
+    "rollup_chercheurs": [
+        ([("citations", DESCENDING), ("chercheur", ASCENDING)], {}),
+        ([("chercheur", ASCENDING)], {}),
+    ],
+    "rollup_publications_auteur_annee": [
+        ([("auteur", ASCENDING), ("annee", ASCENDING)], {"unique": True}),
+    ],
+}
+
+# Requêtes fréquentes dont le plan d'exécution est vérifié par /api/admin/query_plans
+HOT_QUERIES = [
+    ("get_user", "users", {"username": "__probe__"}),
+    ("get_chercheur", "chercheurs", {"nom": "__probe__"}),
+    ("chercheurs_annee", "chercheurs", {"publications": {"$elemMatch": {"$or": [
+        {"annee": {"$gte": 2020, "$lte": 2020}}, {"annee": {"$gte": "2020", "$lte": "2020"}},
+    ]}}}),
+    ("top_articles_chercheur", "chercheurs", {"nom": "__probe__"}),
+    ("publications_auteur", "publications", {"auteurs": "__probe__"}),
+    ("publications_annee", "publications", {"annee": {"$in": [2020, "2020"]}}),
+    ("publications_institution", "publications", {"institutions": "__probe__"}),
+    ("publications_min_citations", "publications", {"citations": {"$gte": 100}}),
+    ("institutions_pays", "institutions", {"pays": {"$in": ["fr", "FR"]}}),
+    ("ingest_publication", "publications", {"titre": "__probe__", "annee": {"$in": [2020, "2020", 2020.0]}}),
+    ("stats_pays_annee", "stats_pays", {"annee": {"$in": [2020, "2020"]}}),
+    ("stats_pays_pays", "stats_pays", {"pays": "__probe__"}),
+    ("collaborations_chercheur1", "collaborations", {"chercheur1": "__probe__"}),
+    ("collaborations_chercheur2", "collaborations", {"chercheur2": "__probe__"}),
+]
+
+# Cache des tokens vérifiés (évite un aller-retour Mongo par requête authentifiée)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", "60"))
+
+# Sérialisation rapide (orjson) des réponses volumineuses et compression
+FAST_JSON = os.getenv("FAST_JSON", "1") == "1" and orjson is not None
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "5"))
+
+# Au-delà de ce nombre de nœuds, la disposition du graphe utilise l'initialisation spectrale (solveur creux)
+GRAPH_LAYOUT_LARGE = int(os.getenv("GRAPH_LAYOUT_LARGE", "500"))
+
+# Cache HTTP des collections (ETag + corps de réponse sérialisés)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+# Délai pendant lequel la version d'une collection est réutilisée sans interroger Mongo
+VERSION_CHECK_INTERVAL = float(os.getenv("VERSION_CHECK_INTERVAL", "5"))
+
+# Agrégats matérialisés : "stream" (change streams, replica set requis), "poll"
+# (scrutation par watermark), "auto" (stream puis repli sur poll) ou "off"
+ROLLUP_MODE = os.getenv("ROLLUP_MODE", "auto")
+# Durée du bail du matérialiseur : un seul worker (ou conteneur) le fait tourner à la fois
+MATERIALIZER_LEASE_SECONDS = int(os.getenv("MATERIALIZER_LEASE_SECONDS", "60"))
+ROLLUP_POLL_INTERVAL = float(os.getenv("ROLLUP_POLL_INTERVAL", "30"))
+# Nombre d'articles conservés par chercheur dans le classement matérialisé
+ROLLUP_TOP_ARTICLES = 100
+
+# Ingestion en masse : taille des lots bulk_write et mémoire tampon avant écriture sur disque
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "1000"))
+INGEST_SPOOL_SIZE = int(os.getenv("INGEST_SPOOL_SIZE", str(16 * 1024 * 1024)))
+BSON_MEDIA_TYPE = "application/bson"
+CSV_MEDIA_TYPE = "text/csv"
+
+# Dérivation complète de collaborations et stats_pays : processus et publications par lot
+DERIVE_WORKERS = int(os.getenv("DERIVE_WORKERS", str(os.cpu_count() or 1)))
+# Lots envoyés au pool sans attendre leur résultat (borne la mémoire de la dérivation)
+DERIVE_IN_FLIGHT = DERIVE_WORKERS * 2
+DERIVE_SHARD_SIZE = int(os.getenv("DERIVE_SHARD_SIZE", "5000"))
+
+# Pool dédié à bcrypt : nombre de threads et nombre max de vérifications en attente
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", "32"))
+
 # Configuration de l'encryption des mots de passe
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+hash_pending = 0
+
+class BoundedCache:
+    """Cache LRU en mémoire, borné en nombre d'entrées (et en octets si `max_bytes`), avec expiration par entrée."""
+
+    def __init__(self, maxsize: int, ttl: float, max_bytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self.pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: Optional[float] = None, size: int = 0):
+        if self.maxsize <= 0 or (self.max_bytes is not None and size > self.max_bytes):
+            return
+        self.pop(key)
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[key] = (value, time.monotonic() + ttl, size)
+        self.bytes += size
+        while len(self._entries) > self.maxsize or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+
+    def pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.bytes -= entry[2]
+        return entry[0]
+
+    def pop_where(self, predicate) -> int:
+        """Supprime les entrées dont la valeur vérifie `predicate`. Renvoie leur nombre."""
+        keys = [key for key, (value, _, _) in self._entries.items() if predicate(value)]
+        for key in keys:
+            self.pop(key)
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+token_cache = BoundedCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
+response_cache = BoundedCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, max_bytes=RESPONSE_CACHE_MAX_BYTES)
+version_cache = BoundedCache(64, VERSION_CHECK_INTERVAL)
+
+# Version du cache de tokens partagée par les workers (document de data_versions) :
+# une entrée mise en cache sous une version antérieure est vérifiée à nouveau
+TOKEN_CACHE_VERSION_ID = "token_cache"
+
+async def token_cache_version() -> int:
+    """Version courante, relue dans MongoDB au plus toutes les VERSION_CHECK_INTERVAL secondes."""
+    version = version_cache.get(TOKEN_CACHE_VERSION_ID)
+    if version is None:
+        counter = await db.data_versions.find_one({"_id": TOKEN_CACHE_VERSION_ID})
+        version = counter["version"] if counter else 0
+        version_cache.set(TOKEN_CACHE_VERSION_ID, version)
+    return version
+
+async def invalidate_user(username: Optional[str] = None) -> int:
+    """À appeler quand un utilisateur est modifié ou supprimé (None = vider le cache).
+
+    Effet immédiat sur ce worker ; les autres workers revérifient leurs tokens
+    en cache dès qu'ils voient la nouvelle version (VERSION_CHECK_INTERVAL).
+    """
+    await db.data_versions.update_one({"_id": TOKEN_CACHE_VERSION_ID}, {"$inc": {"version": 1}}, upsert=True)
+    version_cache.pop(TOKEN_CACHE_VERSION_ID)
+    if username is None:
+        count = len(token_cache)
+        token_cache.clear()
+        return count
+    return token_cache.pop_where(lambda entry: entry[0].get("sub") == username)
 
 app = FastAPI()
 
@@ -34,53 +516,159 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Compression négociée via Accept-Encoding (brotli si disponible, sinon gzip)
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, quality=COMPRESSION_LEVEL, minimum_size=COMPRESSION_MIN_SIZE, gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE, compresslevel=COMPRESSION_LEVEL)
+
+class RequestMetricsMiddleware:
+    """Latence, taille des réponses (octets envoyés) et requêtes en cours, par route.
+
+    Middleware ASGI pur : les réponses en streaming ne sont pas mises en mémoire.
+    La route est le modèle de chemin (/api/chercheurs/{nom}) pour borner le nombre de séries.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        response = {"status": 500, "size": 0}
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        metrics.inc("http_requests_in_flight")
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            metrics.inc("http_requests_in_flight", value=-1)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            labels = (("method", scope["method"]), ("route", route))
+            metrics.observe("http_request_duration_seconds", time.perf_counter() - started, labels)
+            metrics.observe("http_response_size_bytes", response["size"], labels)
+            metrics.inc("http_requests_total", labels + (("status", response["status"]),))
+
+# Ajouté en dernier : mesure aussi la compression et compte les octets réellement envoyés
+if METRICS_ENABLED:
+    app.add_middleware(RequestMetricsMiddleware)
+
+def dump_json(content) -> bytes:
+    if FAST_JSON:
+        return orjson.dumps(content, default=str)
+    return json.dumps(content, ensure_ascii=False, default=str).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """Réponse JSON sans jsonable_encoder, sérialisée par orjson quand il est installé.
+
+    À utiliser pour les routes List[Dict] non typées : les documents Mongo sont
+    déjà sérialisables, la validation élément par élément est inutile.
+    """
+
+    def render(self, content) -> bytes:
+        return dump_json(content)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
 
+def index_name(keys) -> str:
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+async def ensure_indexes() -> Dict[str, List[str]]:
+    """Crée les index de INDEX_SPECS puis vérifie leur présence. Renvoie les index manquants."""
+    missing = {}
+    for collection_name, specs in INDEX_SPECS.items():
+        collection = db[collection_name]
+        for keys, options in specs:
+            try:
+                await collection.create_index(keys, name=index_name(keys), **options)
+            except PyMongoError as e:
+                log(logging.ERROR, "index_creation_failed", collection=collection_name, index=index_name(keys), error=str(e))
+        existing = {index["name"] async for index in collection.list_indexes()}
+        expected = {index_name(keys) for keys, _ in specs}
+        if expected - existing:
+            missing[collection_name] = sorted(expected - existing)
+    if missing:
+        log(logging.WARNING, "indexes_missing", missing=missing)
+    else:
+        log(logging.INFO, "indexes_ready")
+    return missing
+
 # Event handler for application startup
 @app.on_event("startup")
 async def startup_db_client():
+    connect_mongo()
     try:
         # Test if we can connect to MongoDB
         await client.admin.command('ping')
-        print("Successfully connected to MongoDB")
-        
         # Check if users collection exists and count documents
         users_count = await db.users.count_documents({})
-        print(f"Found {users_count} users in database")
+        log(logging.INFO, "mongo_connected", users=users_count)
+
+        if ENSURE_INDEXES:
+            await ensure_indexes()
     except Exception as e:
-        print(f"Failed to connect to MongoDB: {e}")
+        log(logging.ERROR, "mongo_connection_failed", error=str(e))
+
+@app.on_event("shutdown")
+async def shutdown_hash_executor():
+    hash_executor.shutdown(wait=False)
 
 # Fonction pour vérifier les mots de passe hachés
 def verify_password(plain_password, hashed_password):
-    print(f"Verifying password: {plain_password[:2]}*** against hash: {hashed_password[:10]}***")
-    is_verified = pwd_context.verify(plain_password, hashed_password)
-    print(f"Password verification result: {is_verified}")
-    return is_verified
+    return pwd_context.verify(plain_password, hashed_password)
+
+def timed_hashing(func, *args):
+    started = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        metrics.observe("bcrypt_duration_seconds", time.perf_counter() - started)
+
+async def run_hashing(func, *args):
+    """Exécute un calcul bcrypt dans le pool dédié, ou renvoie 429 si la file est pleine."""
+    global hash_pending
+    if hash_pending >= HASH_QUEUE_LIMIT:
+        metrics.inc("bcrypt_rejected_total")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Trop de connexions simultanées, réessayez dans un instant",
+            headers={"Retry-After": "1"},
+        )
+    hash_pending += 1
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(hash_executor, timed_hashing, func, *args)
+    finally:
+        hash_pending -= 1
+        metrics.observe("bcrypt_wait_seconds", time.perf_counter() - started)
 
 # Fonction pour obtenir un utilisateur depuis la base de données
 async def get_user(username: str):
-    print(f"Looking for user: {username}")
     # Note: Using db.users - make sure this collection exists
     user = await db.users.find_one({"username": username})
-    if user:
-        print(f"User found: {username}")
-    else:
-        print(f"User not found: {username}")
+    log(logging.DEBUG, "user_lookup", sample=LOG_SAMPLE_RATE, username=username, found=user is not None)
     return user
 
 # Fonction pour authentifier un utilisateur
 async def authenticate_user(username: str, password: str):
-    print(f"Attempting to authenticate user: {username}")
     user = await get_user(username)
     if not user:
-        print(f"User {username} not found in database")
+        log(logging.INFO, "authentication_failed", username=username, reason="unknown_user")
         return False
-    if not verify_password(password, user["password"]):
-        print(f"Password verification failed for user {username}")
+    if not await run_hashing(verify_password, password, user["password"]):
+        log(logging.INFO, "authentication_failed", username=username, reason="password")
         return False
-    print(f"Authentication successful for user {username}")
+    log(logging.DEBUG, "authentication_succeeded", sample=LOG_SAMPLE_RATE, username=username)
     return user
 
 def create_access_token(data: Dict, expires_delta: timedelta):
@@ -91,10 +679,8 @@ def create_access_token(data: Dict, expires_delta: timedelta):
 
 @app.post("/token")
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    print(f"Login attempt for username: {form_data.username}")
     user = await authenticate_user(form_data.username, form_data.password)
     if not user:
-        print(f"Authentication failed for {form_data.username}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Nom d'utilisateur ou mot de passe incorrect",
@@ -109,7 +695,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     
-    print(f"Token created for user: {form_data.username}")
+    log(logging.DEBUG, "token_created", sample=LOG_SAMPLE_RATE, username=form_data.username)
     return {"access_token": access_token, "token_type": "bearer"}
 
 async def verify_token(token: str = Depends(oauth2_scheme)):
@@ -118,62 +704,697 @@ async def verify_token(token: str = Depends(oauth2_scheme)):
         detail="Token d'authentification invalide",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    cached = token_cache.get(token)
+    if cached is not None:
+        payload, version = cached
+        if version == await token_cache_version():
+            return payload
+        token_cache.pop(token)
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
         
+        # Version lue avant la vérification : une invalidation concurrente n'est pas perdue
+        version = await token_cache_version()
         # Vérifier que l'utilisateur existe toujours dans la base de données
         user = await get_user(username)
         if user is None:
             raise credentials_exception
-            
+
+        # Le token reste en cache au plus jusqu'à son expiration
+        token_cache.set(token, (payload, version), ttl=payload["exp"] - time.time() if "exp" in payload else None)
         return payload
     except jwt.PyJWTError:
         raise credentials_exception
 
-@app.get("/api/chercheurs", response_model=List[Dict])
-async def get_chercheurs(token: dict = Depends(verify_token)):
-    cursor = db.chercheurs.find({}, {"_id": 0})
-    return [doc async for doc in cursor]
+async def require_admin(token: dict = Depends(verify_token)):
+    if token.get("sub") not in ADMIN_USERS:
+        raise HTTPException(status_code=403, detail="Accès réservé aux administrateurs")
+    return token
+
+# Pagination par curseur (keyset) sur _id et projection des champs
+FIELD_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z0-9_]+)*$")
+
+def encode_cursor(last_id: ObjectId) -> str:
+    return base64.urlsafe_b64encode(last_id.binary).decode().rstrip("=")
+
+def decode_cursor(token: str) -> ObjectId:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        return ObjectId(raw)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+def parse_fields(fields: Optional[str], hidden: tuple = ()) -> Optional[Dict]:
+    """Construit la projection Mongo à partir de `fields=a,b.c` (None = tous les champs)."""
+    if not fields:
+        return {name: 0 for name in hidden} or None
+    projection = {}
+    for name in fields.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        if not FIELD_NAME_RE.match(name):
+            raise HTTPException(status_code=400, detail=f"Champ invalide: {name}")
+        if name.split(".")[0] in hidden:
+            continue
+        projection[name] = 1
+    if not projection:
+        raise HTTPException(status_code=400, detail="Aucun champ valide demandé")
+    projection["_id"] = 1
+    return projection
+
+async def stream_ndjson(cursor, keep_id: bool):
+    """Écrit les documents au fil de l'eau, une ligne JSON par document."""
+    async for doc in cursor:
+        if keep_id:
+            doc["_id"] = str(doc["_id"])
+        else:
+            doc.pop("_id", None)
+        yield dump_json(doc) + b"\n"
+
+async def fetch_page(collection, limit: Optional[int], after: Optional[str],
+                     fields: Optional[str], stream: bool = False, batch_size: int = STREAM_BATCH_SIZE,
+                     query: Optional[Dict] = None, hidden: tuple = (), keep_id: bool = False,
+                     sort: Optional[List[tuple]] = None):
+    """Lit une page de `collection` triée par _id. Renvoie (documents, en-têtes).
+
+    Sans `limit`, toute la collection est renvoyée (comportement historique).
+    Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor.
+    En mode `stream`, les documents sont envoyés en NDJSON dès leur lecture
+    (pas de X-Next-Cursor : le client lit le flux jusqu'au bout).
+    Avec un tri explicite (`sort`), `limit` donne les N premiers documents, sans page suivante.
+    """
+    query = dict(query or {})
+    if after:
+        if sort:
+            raise HTTPException(status_code=400, detail="Pagination par curseur impossible avec un tri explicite")
+        query["_id"] = {"$gt": decode_cursor(after)}
+    cursor = collection.find(query, parse_fields(fields, hidden)).sort((sort or []) + [("_id", ASCENDING)])
+    if stream:
+        if limit:
+            cursor = cursor.limit(limit)
+        cursor = cursor.batch_size(batch_size)
+        return StreamingResponse(stream_ndjson(cursor, keep_id), media_type=NDJSON_MEDIA_TYPE)
+    if limit:
+        # Un document de plus pour savoir s'il existe une page suivante
+        cursor = cursor.limit(limit + 1)
+    docs = [doc async for doc in cursor]
+    headers = {}
+    if limit and len(docs) > limit:
+        docs = docs[:limit]
+        if not sort:
+            headers["X-Next-Cursor"] = encode_cursor(docs[-1]["_id"])
+    for doc in docs:
+        if keep_id:
+            doc["_id"] = str(doc["_id"])
+        else:
+            del doc["_id"]
+    return docs, headers
+
+# Versions des collections, ETag et réponses conditionnelles
+async def collection_state(name: str) -> tuple:
+    """État d'une collection : (compteur `data_versions`, nombre de documents, dernier _id).
+
+    Le compteur est incrémenté par `bump_version` à chaque écriture de l'API ;
+    le nombre de documents et le dernier _id détectent les insertions faites hors de l'API.
+    """
+    state = version_cache.get(name)
+    if state is not None:
+        return state
+    # Lu avec la même préférence que les données servies : la version décrit ce qui est lu
+    counter = await read_db.data_versions.find_one({"_id": name})
+    count = await read_db[name].estimated_document_count()
+    last = await read_db[name].find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    state = (counter["version"] if counter else 0, count, last["_id"] if last else None)
+    version_cache.set(name, state)
+    return state
+
+async def collection_version(name: str) -> str:
+    counter, count, last_id = await collection_state(name)
+    return f"{counter}.{count}.{last_id or ''}"
+
+async def bump_version(name: str) -> int:
+    """Signale qu'une collection a changé : invalide sa version et les réponses en cache. Renvoie le compteur."""
+    counter = await db.data_versions.find_one_and_update(
+        {"_id": name}, {"$inc": {"version": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+    )
+    version_cache.pop(name)
+    response_cache.pop_where(lambda entry: name in entry[0])
+    return counter["version"]
+
+async def compute_etag(request: Request, collections: List[str]) -> str:
+    """ETag faible : le même tag couvre les corps identité, gzip et brotli du middleware de compression."""
+    parts = [request.url.path, str(sorted(request.query_params.multi_items())), request.headers.get("accept", "")]
+    parts += [await collection_version(name) for name in collections]
+    return 'W/"' + hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:24] + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    # Comparaison faible (If-None-Match) : préfixe W/ ignoré des deux côtés
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+CACHE_CONTROL = "private, no-cache"
+# Le corps dépend du format négocié (Accept) et de la compression (Accept-Encoding)
+CACHE_VARY = "Accept, Accept-Encoding"
+
+async def render_json(docs: List[Dict]):
+    return dump_json(docs), "application/json"
+
+async def cached_response(request: Request, collections: List[str], produce, render=render_json) -> Response:
+    """Sert `produce()` avec ETag/If-None-Match et met en cache le corps sérialisé.
+
+    `produce` renvoie une liste de documents, un tuple (documents, en-têtes)
+    ou une Response déjà construite (streaming, non mise en cache).
+    `render` transforme les documents en (corps, media type) : JSON par défaut.
+    """
+    etag = await compute_etag(request, collections)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": CACHE_VARY}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    cached = response_cache.get(etag)
+    if cached is not None:
+        _, body, media_type, extra_headers = cached
+        return Response(body, media_type=media_type, headers={**extra_headers, **headers})
+    result = await produce()
+    if isinstance(result, Response):
+        result.headers.update(headers)
+        return result
+    docs, extra_headers = result if isinstance(result, tuple) else (result, {})
+    body, media_type = await render(docs)
+    response_cache.set(etag, (tuple(collections), body, media_type, extra_headers), size=len(body))
+    return Response(body, media_type=media_type, headers={**extra_headers, **headers})
+
+# Représentation colonnaire (Arrow IPC stream ou Parquet)
+def flatten_docs(docs: List[Dict], explode: Optional[str]) -> List[Dict]:
+    """Éclate le tableau `explode` : une ligne par élément, les sous-champs en colonnes `explode.champ`.
+
+    Les autres tableaux du document ne sont pas recopiés sur chaque ligne : ils
+    n'apparaissent que sur la première ligne du document (None sur les suivantes).
+    """
+    if not explode:
+        return docs
+    rows = []
+    for doc in docs:
+        items = doc.pop(explode, None) or [None]
+        lists = {key: doc.pop(key) for key in list(doc) if isinstance(doc[key], list)}
+        for index, item in enumerate(items):
+            row = {**doc, **lists} if index == 0 else dict(doc)
+            if isinstance(item, dict):
+                row.update({f"{explode}.{key}": value for key, value in item.items()})
+            elif item is not None:
+                row[explode] = item
+            rows.append(row)
+    return rows
+
+def to_year(value) -> Optional[int]:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+def build_table(rows: List[Dict], dictionary_fields: set = COLUMNAR_DICTIONARY_FIELDS):
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    arrays = []
+    for name in names:
+        values = [row.get(name) for row in rows]
+        if name in COLUMNAR_YEAR_FIELDS:
+            values = [to_year(value) for value in values]
+        try:
+            array = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Types hétérogènes dans la colonne : repli sur des chaînes
+            array = pa.array([None if value is None else str(value) for value in values])
+        if name in dictionary_fields and pa.types.is_string(array.type):
+            # Lu par pandas comme une colonne catégorielle
+            array = array.dictionary_encode()
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, names=names)
+
+def encode_table(table, fmt: str) -> bytes:
+    sink = pa.BufferOutputStream()
+    if fmt == "parquet":
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def columnar_renderer(name: str, fmt: str):
+    async def render(docs: List[Dict]):
+        def encode():
+            explode = COLUMNAR_EXPLODE.get(name)
+            # Champs du document parent : répétés sur chaque ligne éclatée, donc encodés en dictionnaire
+            parent_fields = {field for doc in docs for field in doc if field != explode} if explode else set()
+            rows = flatten_docs(docs, explode)
+            return encode_table(build_table(rows, COLUMNAR_DICTIONARY_FIELDS | parent_fields), fmt)
+        # La construction de la table est coûteuse en CPU : hors de la boucle asyncio
+        return await asyncio.to_thread(encode), COLUMNAR_MEDIA_TYPES[fmt]
+    return render
+
+# Filtres typés des endpoints de liste, traduits en requêtes Mongo indexées
+def year_clause(field: str, start_year: Optional[int], end_year: Optional[int]) -> Dict:
+    """Années comprises entre deux bornes, qu'elles soient stockées en nombre ou en chaîne."""
+    numeric = {}
+    if start_year is not None:
+        numeric["$gte"] = start_year
+    if end_year is not None:
+        numeric["$lte"] = end_year
+    text = {operator: str(value) for operator, value in numeric.items()}
+    return {"$or": [{field: numeric}, {field: text}]}
+
+async def country_institutions(pays: str) -> List[str]:
+    countries = await institution_countries()
+    return [nom for nom, country in countries.items() if country == pays]
+
+async def collection_query(name: str, filters: Dict) -> Dict:
+    """Requête Mongo de `filters` pour la collection `name` (400 si un filtre n'y a pas de sens)."""
+    start_year, end_year = filters.get("start_year"), filters.get("end_year")
+    if filters.get("annee") is not None:
+        start_year = end_year = filters["annee"]
+    auteur, pays, institution = filters.get("auteur"), filters.get("pays"), filters.get("institution")
+    min_citations = filters.get("min_citations")
+    clauses = []
+    unsupported = []
+    has_years = start_year is not None or end_year is not None
+
+    if name == "publications":
+        if has_years:
+            clauses.append(year_clause("annee", start_year, end_year))
+        if auteur:
+            clauses.append({"auteurs": auteur})
+        if institution:
+            clauses.append({"institutions": institution})
+        if pays:
+            clauses.append({"institutions": {"$in": await country_institutions(pays)}})
+        if min_citations is not None:
+            clauses.append({"citations": {"$gte": min_citations}})
+    elif name == "chercheurs":
+        # Chercheurs ayant au moins une publication dans la période
+        if has_years or min_citations is not None:
+            # Années stockées tantôt en chaîne, tantôt en flottant (comme dans `publications`)
+            publication = year_clause("annee", start_year, end_year) if has_years else {}
+            if min_citations is not None:
+                publication["citations"] = {"$gte": min_citations}
+            clauses.append({"publications": {"$elemMatch": publication}})
+        if auteur:
+            clauses.append({"nom": auteur})
+        if institution:
+            clauses.append({"institutions": institution})
+        if pays:
+            clauses.append({"institutions": {"$in": await country_institutions(pays)}})
+    elif name == "stats_pays":
+        if has_years:
+            clauses.append(year_clause("annee", start_year, end_year))
+        if pays:
+            clauses.append({"pays": pays})
+        unsupported = [key for key in ("auteur", "institution", "min_citations") if filters.get(key) is not None]
+    elif name == "institutions":
+        if auteur:
+            clauses.append({"chercheurs": auteur})
+        if institution:
+            clauses.append({"nom": institution})
+        if pays:
+            # Codes ISO des institutions correspondant au nom de pays demandé
+            codes = await read_db.institutions.distinct("pays")
+            clauses.append({"pays": {"$in": [code for code in codes if country_name(code) == pays] + [pays]}})
+        unsupported = [key for key in ("min_citations",) if filters.get(key) is not None] + (["annee"] if has_years else [])
+    elif name == "collaborations":
+        if auteur:
+            clauses.append({"$or": [{"chercheur1": auteur}, {"chercheur2": auteur}]})
+        # premiere_collaboration / derniere_collaboration ne sont pas renseignées dans les données :
+        # un filtre sur la période renverrait toujours une liste vide
+        unsupported = [key for key in ("pays", "institution", "min_citations") if filters.get(key) is not None]
+        unsupported += ["annee"] if has_years else []
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"Filtres non disponibles pour {name} : {', '.join(unsupported)}")
+    if not clauses:
+        return {}
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def parse_sort(sort: Optional[str]) -> Optional[List[tuple]]:
+    """`sort=-citations,titre` -> [("citations", -1), ("titre", 1)]."""
+    if not sort:
+        return None
+    keys = []
+    for name in sort.split(","):
+        name = name.strip()
+        direction = DESCENDING if name.startswith("-") else ASCENDING
+        name = name.lstrip("-+")
+        if not FIELD_NAME_RE.match(name) or name == "password":
+            raise HTTPException(status_code=400, detail=f"Champ de tri invalide: {name}")
+        keys.append((name, direction))
+    return keys
+
+def filter_params(
+    start_year: Optional[int] = Query(None, description="Première année incluse"),
+    end_year: Optional[int] = Query(None, description="Dernière année incluse"),
+    annee: Optional[int] = Query(None, description="Année exacte"),
+    auteur: Optional[str] = Query(None, description="Auteur ou chercheur"),
+    pays: Optional[str] = Query(None, description="Nom du pays (ex. France)"),
+    institution: Optional[str] = Query(None, description="Nom exact de l'institution"),
+    min_citations: Optional[int] = Query(None, ge=0, description="Nombre minimal de citations"),
+    sort: Optional[str] = Query(None, description="Champs de tri séparés par des virgules, - pour décroissant"),
+) -> Dict:
+    return {
+        "start_year": start_year, "end_year": end_year, "annee": annee, "auteur": auteur,
+        "pays": pays, "institution": institution, "min_citations": min_citations, "sort": sort,
+    }
+
+async def serve_collection(request: Request, name: str, page: Dict, filters: Optional[Dict] = None) -> Response:
+    page = dict(page)
+    filters = filters or {}
+    page["sort"] = parse_sort(filters.get("sort"))
+    collections = [name]
+    if filters.get("pays") and name in ("publications", "chercheurs"):
+        # Le filtre par pays passe par les institutions
+        collections.append("institutions")
+
+    async def produce():
+        return await fetch_page(read_db[name], query=await collection_query(name, filters), **page)
+
+    fmt = page.pop("format")
+    if fmt == "json":
+        return await cached_response(request, collections, produce)
+    if pa is None:
+        raise HTTPException(status_code=406, detail="Export colonnaire indisponible (pyarrow non installé)")
+    page["stream"] = False
+    return await cached_response(request, collections, produce, render=columnar_renderer(name, fmt))
+
+def page_params(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Taille de la page"),
+    after: Optional[str] = Query(None, description="Curseur renvoyé dans X-Next-Cursor"),
+    fields: Optional[str] = Query(None, description="Champs à renvoyer, séparés par des virgules"),
+    stream: bool = Query(False, description="Réponse NDJSON en streaming"),
+    batch_size: int = Query(STREAM_BATCH_SIZE, ge=1, le=10000, description="Taille des lots Motor en streaming"),
+    format: Optional[str] = Query(None, pattern="^(json|arrow|parquet)$", description="json, arrow ou parquet"),
+) -> Dict:
+    # Le streaming et les formats colonnaires peuvent aussi être demandés par négociation de contenu
+    accept = request.headers.get("accept", "")
+    stream = stream or NDJSON_MEDIA_TYPE in accept
+    if format is None:
+        format = next((fmt for fmt, media_type in COLUMNAR_MEDIA_TYPES.items() if media_type in accept), "json")
+    return {"limit": limit, "after": after, "fields": fields, "stream": stream, "batch_size": batch_size,
+            "format": format}
+
+@app.get("/api/chercheurs", response_model=List[Dict], response_class=FastJSONResponse)
+async def get_chercheurs(request: Request, page: Dict = Depends(page_params),
+        filters: Dict = Depends(filter_params), token: dict = Depends(verify_token)):
+    return await serve_collection(request, "chercheurs", page, filters)
 
 @app.get("/api/chercheurs/{nom}", response_model=Dict)
 async def get_chercheur(nom: str, token: dict = Depends(verify_token)):
-    doc = await db.chercheurs.find_one({"nom": nom}, {"_id": 0})
+    doc = await read_db.chercheurs.find_one({"nom": nom}, {"_id": 0})
     if not doc:
         raise HTTPException(status_code=404, detail="Chercheur non trouvé")
     return doc
 
-@app.get("/api/publications", response_model=List[Dict])
-async def get_publications(token: dict = Depends(verify_token)):
-    cursor = db.publications.find({}, {"_id": 0})
-    return [doc async for doc in cursor]
+@app.get("/api/publications", response_model=List[Dict], response_class=FastJSONResponse)
+async def get_publications(request: Request, page: Dict = Depends(page_params),
+        filters: Dict = Depends(filter_params), token: dict = Depends(verify_token)):
+    return await serve_collection(request, "publications", page, filters)
+
+@app.get("/api/stats_pays", response_model=List[Dict], response_class=FastJSONResponse)
+async def get_stats_pays(request: Request, page: Dict = Depends(page_params),
+        filters: Dict = Depends(filter_params), token: dict = Depends(verify_token)):
+    return await serve_collection(request, "stats_pays", page, filters)
+
+@app.get("/api/institutions", response_model=List[Dict], response_class=FastJSONResponse)
+async def get_institutions(request: Request, page: Dict = Depends(page_params),
+        filters: Dict = Depends(filter_params), token: dict = Depends(verify_token)):
+    return await serve_collection(request, "institutions", page, filters)
+
+@app.get("/api/collaborations", response_model=List[Dict], response_class=FastJSONResponse)
+async def get_collaborations(request: Request, page: Dict = Depends(page_params),
+        filters: Dict = Depends(filter_params), token: dict = Depends(verify_token)):
+    return await serve_collection(request, "collaborations", page, filters)
+
+# Graphe de collaborations
+async def load_collaboration_edges() -> List[tuple]:
+    """Arêtes (chercheur1, chercheur2, poids) valides de la collection collaborations."""
+    cursor = read_db.collaborations.find({}, {"_id": 0, "chercheur1": 1, "chercheur2": 1, "poids": 1})
+    return [
+        (doc["chercheur1"], doc["chercheur2"], doc["poids"])
+        async for doc in cursor
+        if doc.get("chercheur1") and doc.get("chercheur2") and doc.get("poids")
+    ]
+
+def compute_layout(edges: List[tuple], method: str) -> Dict:
+    G = nx.Graph()
+    for source, target, weight in edges:
+        G.add_edge(source, target, weight=weight)
+    if method == "auto":
+        method = "sparse" if G.number_of_nodes() >= GRAPH_LAYOUT_LARGE else "spring"
+    if method == "sparse":
+        # Position initiale spectrale puis 30 itérations de ressorts au lieu de 50. Chaque itération
+        # reste quadratique : ~6 s pour 1400 nœuds, ~36 s pour 4100 (spring_layout seul : 8 s / 53 s ;
+        # method="energy" et forceatlas2_layout de networkx ne sont pas plus rapides sur ces graphes)
+        pos = nx.spring_layout(G, pos=nx.spectral_layout(G), iterations=30, seed=42)
+    else:
+        pos = nx.spring_layout(G, seed=42)
+    return {
+        "method": method,
+        "nodes": [
+            {"nom": node, "x": float(pos[node][0]), "y": float(pos[node][1]), "degre": G.degree(node)}
+            for node in G.nodes()
+        ],
+        "edges": [{"source": source, "target": target} for source, target in G.edges()],
+    }
+
+@app.get("/api/collaborations/layout", response_model=Dict)
+async def get_collaborations_layout(request: Request,
+                                    method: str = Query("auto", pattern="^(auto|spring|sparse)$"),
+                                    token: dict = Depends(verify_token)):
+    """Coordonnées précalculées du graphe de collaborations, recalculées seulement quand la collection change."""
+    if nx is None:
+        raise HTTPException(status_code=501, detail="Analyse de graphe indisponible (networkx non installé)")
+
+    async def produce():
+        edges = await load_collaboration_edges()
+        return await asyncio.to_thread(compute_layout, edges, method)
+
+    return await cached_response(request, ["collaborations"], produce)
+
+class CollaborationGraph:
+    """Graphe de collaborations en mémoire : matrice d'adjacence CSR pondérée et symétrique.
+
+    Une instance par version de la collection, construite au premier appel puis quand la
+    version change. Si des collaborations ont seulement été ajoutées, la nouvelle version
+    reprend une copie de la précédente et ne lit que les nouvelles arêtes.
+    Les résultats d'analyse sont conservés avec la version.
+    """
+
+    def __init__(self, previous: Optional["CollaborationGraph"] = None):
+        # `previous` : version dont on ne lit que les ajouts (copiée, jamais modifiée)
+        self.state = None
+        self.last_id = previous.last_id if previous else None
+        self.names = list(previous.names) if previous else []
+        self.index = dict(previous.index) if previous else {}
+        self.rows = list(previous.rows) if previous else []
+        self.cols = list(previous.cols) if previous else []
+        self.weights = list(previous.weights) if previous else []
+        self.matrix = sp.csr_matrix((0, 0)) if sp is not None else None
+        self.results = {}
+
+    def node(self, name: str) -> int:
+        if name not in self.index:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+        return self.index[name]
+
+    async def load(self, query: Dict, state: tuple):
+        projection = {"chercheur1": 1, "chercheur2": 1, "poids": 1}
+        async for doc in read_db.collaborations.find(query, projection).sort("_id", 1):
+            self.last_id = doc["_id"]
+            if doc.get("chercheur1") and doc.get("chercheur2") and doc.get("poids"):
+                source, target = self.node(doc["chercheur1"]), self.node(doc["chercheur2"])
+                self.rows += [source, target]
+                self.cols += [target, source]
+                self.weights += [doc["poids"], doc["poids"]]
+        size = len(self.names)
+        # Les paires en double voient leurs poids additionnés
+        self.matrix = sp.csr_matrix((self.weights, (self.rows, self.cols)), shape=(size, size), dtype=float)
+        self.state = state
+
+    def cached(self, key, compute):
+        if key not in self.results:
+            self.results[key] = compute()
+        return self.results[key]
+
+    def degrees(self) -> List[Dict]:
+        degree = np.diff(self.matrix.indptr)
+        weighted = np.asarray(self.matrix.sum(axis=1)).ravel()
+        return [
+            {"nom": name, "degre": int(degree[i]), "degre_pondere": float(weighted[i])}
+            for i, name in enumerate(self.names)
+        ]
+
+    def pagerank(self, alpha: float = 0.85, tol: float = 1e-10, max_iter: int = 100) -> List[Dict]:
+        size = len(self.names)
+        if not size:
+            return []
+        out_weight = np.asarray(self.matrix.sum(axis=1)).ravel()
+        inverse = np.divide(1.0, out_weight, out=np.zeros(size), where=out_weight > 0)
+        transition = (sp.diags(inverse) @ self.matrix).T.tocsr()
+        dangling = out_weight == 0
+        rank = np.full(size, 1.0 / size)
+        for _ in range(max_iter):
+            updated = alpha * (transition @ rank) + (alpha * rank[dangling].sum() + 1 - alpha) / size
+            converged = np.abs(updated - rank).sum() < size * tol
+            rank = updated
+            if converged:
+                break
+        degree = np.diff(self.matrix.indptr)
+        return [
+            {"nom": name, "pagerank": float(rank[i]), "centralite_degre": float(degree[i]) / max(size - 1, 1)}
+            for i, name in enumerate(self.names)
+        ]
+
+    def groups(self, labels) -> List[Dict]:
+        members = {}
+        for i, label in enumerate(labels):
+            members.setdefault(int(label), []).append(self.names[i])
+        groups = sorted(members.values(), key=len, reverse=True)
+        return [{"groupe": i, "taille": len(group), "membres": sorted(group)} for i, group in enumerate(groups)]
+
+    def components(self) -> List[Dict]:
+        _, labels = connected_components(self.matrix, directed=False)
+        return self.groups(labels)
 
-@app.get("/api/stats_pays", response_model=List[Dict])
-async def get_stats_pays(token: dict = Depends(verify_token)):
-    cursor = db.stats_pays.find({}, {"_id": 0})
-    return [doc async for doc in cursor]
+    def communities(self) -> List[Dict]:
+        labels = np.zeros(len(self.names), dtype=int)
+        G = nx.from_scipy_sparse_array(self.matrix)
+        for label, community in enumerate(nx.community.louvain_communities(G, weight="weight", seed=42)):
+            labels[list(community)] = label
+        return self.groups(labels)
 
-@app.get("/api/institutions", response_model=List[Dict])
-async def get_institutions(token: dict = Depends(verify_token)):
-    cursor = db.institutions.find({}, {"_id": 0})
-    return [doc async for doc in cursor]
+    def ego(self, name: str, k: int) -> Dict:
+        """Réseau égocentré : nœuds à au plus `k` sauts de `name` et arêtes entre eux."""
+        distances = {self.index[name]: 0}
+        frontier = [self.index[name]]
+        indptr, indices = self.matrix.indptr, self.matrix.indices
+        for hop in range(1, k + 1):
+            following = []
+            for node in frontier:
+                for neighbor in indices[indptr[node]:indptr[node + 1]]:
+                    if neighbor not in distances:
+                        distances[neighbor] = hop
+                        following.append(neighbor)
+            frontier = following
+        sub = self.matrix[list(distances)][:, list(distances)].tocoo()
+        members = list(distances)
+        return {
+            "centre": name,
+            "k": k,
+            "nodes": [{"nom": self.names[node], "distance": hop} for node, hop in distances.items()],
+            "edges": [
+                {"source": self.names[members[i]], "target": self.names[members[j]], "poids": float(w)}
+                for i, j, w in zip(sub.row, sub.col, sub.data) if i < j
+            ],
+        }
 
-@app.get("/api/collaborations", response_model=List[Dict])
-async def get_collaborations(token: dict = Depends(verify_token)):
-    cursor = db.collaborations.find({}, {"_id": 0})
-    return [doc async for doc in cursor]
+# Version courante : remplacée d'un bloc par une version complète, jamais modifiée en place.
+# Une requête garde la version obtenue au début, même si une nouvelle la remplace entre-temps.
+collaboration_graph = CollaborationGraph()
+collaboration_graph_lock = asyncio.Lock()
 
-@app.get("/api/users", response_model=List[Dict])
-async def get_users(token: dict = Depends(verify_token)):
+async def get_collaboration_graph() -> CollaborationGraph:
+    """Version du graphe à jour, construite à côté de la précédente quand la collection a changé."""
+    global collaboration_graph
+    if sp is None or nx is None:
+        raise HTTPException(status_code=501, detail="Analyse de graphe indisponible (scipy/networkx non installés)")
+    state = await collection_state("collaborations")
+    current = collaboration_graph
+    if state == current.state:
+        return current
+    async with collaboration_graph_lock:
+        current = collaboration_graph
+        if state == current.state:
+            return current
+        # Même compteur d'écritures et plus de documents : uniquement des insertions
+        append_only = (
+            current.state is not None and current.last_id is not None
+            and state[0] == current.state[0] and state[1] > current.state[1]
+        )
+        graph = CollaborationGraph(current if append_only else None)
+        await graph.load({"_id": {"$gt": current.last_id}} if append_only else {}, state)
+        collaboration_graph = graph
+    return graph
+
+@app.get("/api/collaborations/degres", response_model=List[Dict], response_class=FastJSONResponse)
+async def get_collaborations_degres(request: Request, n: Optional[int] = Query(None, ge=1),
+                                    token: dict = Depends(verify_token)):
+    """Degré et degré pondéré (somme des `poids`) de chaque chercheur, par ordre décroissant."""
+    graph = await get_collaboration_graph()
+
+    async def produce():
+        degrees = graph.cached("degres", graph.degrees)
+        return sorted(degrees, key=lambda row: (-row["degre_pondere"], row["nom"]))[:n]
+
+    return await cached_response(request, ["collaborations"], produce)
+
+@app.get("/api/collaborations/pagerank", response_model=List[Dict], response_class=FastJSONResponse)
+async def get_collaborations_pagerank(request: Request, n: Optional[int] = Query(None, ge=1),
+                                      token: dict = Depends(verify_token)):
+    """PageRank pondéré et centralité de degré, par ordre décroissant de PageRank."""
+    graph = await get_collaboration_graph()
+
+    async def produce():
+        ranks = await asyncio.to_thread(graph.cached, "pagerank", graph.pagerank)
+        return sorted(ranks, key=lambda row: (-row["pagerank"], row["nom"]))[:n]
+
+    return await cached_response(request, ["collaborations"], produce)
+
+@app.get("/api/collaborations/composantes", response_model=List[Dict], response_class=FastJSONResponse)
+async def get_collaborations_composantes(request: Request, token: dict = Depends(verify_token)):
+    """Composantes connexes du graphe, de la plus grande à la plus petite."""
+    graph = await get_collaboration_graph()
+
+    async def produce():
+        return graph.cached("composantes", graph.components)
+
+    return await cached_response(request, ["collaborations"], produce)
+
+@app.get("/api/collaborations/communautes", response_model=List[Dict], response_class=FastJSONResponse)
+async def get_collaborations_communautes(request: Request, token: dict = Depends(verify_token)):
+    """Communautés détectées par l'algorithme de Louvain (pondéré par `poids`)."""
+    graph = await get_collaboration_graph()
+
+    async def produce():
+        return await asyncio.to_thread(graph.cached, "communautes", graph.communities)
+
+    return await cached_response(request, ["collaborations"], produce)
+
+@app.get("/api/collaborations/ego/{nom}", response_model=Dict)
+async def get_collaborations_ego(request: Request, nom: str, k: int = Query(1, ge=1, le=5),
+                                 token: dict = Depends(verify_token)):
+    """Réseau égocentré à `k` sauts d'un chercheur."""
+    graph = await get_collaboration_graph()
+    if nom not in graph.index:
+        raise HTTPException(status_code=404, detail="Chercheur absent du graphe de collaborations")
+
+    async def produce():
+        return graph.cached(("ego", nom, k), lambda: graph.ego(nom, k))
+
+    return await cached_response(request, ["collaborations"], produce)
+
+@app.get("/api/users", response_model=List[Dict], response_class=FastJSONResponse)
+async def get_users(page: Dict = Depends(page_params), token: dict = Depends(verify_token)):
     # Use correct collection path - users not research_db_structure.users since we already selected the database
-    cursor = db.users.find({}, {"password": 0})
-    users = []
-    async for doc in cursor:
-        doc["_id"] = str(doc["_id"])  # Convertir ObjectId en string
-        users.append(doc)
-    return users
+    # Le mot de passe n'est jamais renvoyé, même s'il est demandé dans `fields`
+    # Pas de cache HTTP : les utilisateurs peuvent être modifiés hors de l'API
+    page = {key: value for key, value in page.items() if key != "format"}
+    result = await fetch_page(db.users, hidden=("password",), keep_id=True, **page)
+    if isinstance(result, Response):
+        return result
+    users, headers = result
+    return FastJSONResponse(users, headers=headers)
 
 @app.get("/api/me", response_model=Dict)
 async def get_current_user(token: dict = Depends(verify_token)):
@@ -189,6 +1410,1338 @@ async def get_current_user(token: dict = Depends(verify_token)):
     
     return user
 
+# Agrégations côté serveur (remplacent les groupby pandas du dashboard)
+def year_variants(year: int) -> List:
+    # Valeurs possibles d'une même année dans la base (entier, chaîne, flottant)
+    return [year, str(year), float(year)]
+
+def year_expr(field: str) -> Dict:
+    # `annee` est stocké tantôt en chaîne ("2015"), tantôt en flottant (2015.0)
+    return {"$toInt": {"$convert": {"input": field, "to": "double", "onError": None, "onNull": None}}}
+
+async def run_pipeline(collection, pipeline: List[Dict]) -> List[Dict]:
+    return [doc async for doc in collection.aggregate(pipeline)]
+
+CITED_PUBLICATION_MATCH = {
+    "publications.titre": {"$nin": [None, ""]},
+    "publications.citations": {"$ne": None},
+}
+
+# Agrégats matérialisés, maintenus incrémentalement à partir de chercheurs et publications
+#   rollup_chercheurs : citations, nombre d'institutions et meilleurs articles par chercheur (_id du chercheur)
+#   rollup_publications_auteur_annee : nombre de publications par (auteur, annee)
+#   rollup_publication_keys : contribution de chaque publication, pour retrancher l'ancienne lors d'une modification
+#   rollup_state : watermark de chaque collection source et jeton de reprise du change stream
+ROLLUP_SOURCES = ("chercheurs", "publications")
+ROLLUP_TARGETS = {
+    "chercheurs": ["rollup_chercheurs"],
+    "publications": ["rollup_publications_auteur_annee", "rollup_publication_keys"],
+}
+ROLLUP_STREAM_PIPELINE = [{"$match": {"ns.coll": {"$in": list(ROLLUP_SOURCES)}}}]
+# Codes d'erreur Mongo : change streams indisponibles (serveur autonome), historique de reprise perdu
+CHANGE_STREAM_UNSUPPORTED = 40573
+CHANGE_STREAM_HISTORY_LOST = 286
+# Suffixe des collections où un recalcul complet est construit avant d'être substitué aux rollups
+ROLLUP_STAGING_SUFFIX = "_rebuild"
+
+rollup_lock = asyncio.Lock()
+materializer_task: Optional[asyncio.Task] = None
+
+def chercheur_rollup(doc: Dict) -> Dict:
+    """Ligne de rollup_chercheurs (mêmes règles que les pipelines de /api/aggregations)."""
+    articles = {}
+    for publication in doc.get("publications") or []:
+        titre, citations = publication.get("titre"), publication.get("citations")
+        if titre in (None, "") or citations is None:
+            continue
+        articles[titre] = articles.get(titre, 0) + citations
+    ranked = sorted(articles.items(), key=lambda item: -item[1])[:ROLLUP_TOP_ARTICLES]
+    return {
+        "_id": doc["_id"],
+        "chercheur": doc.get("nom"),
+        # None : aucun article cité, le chercheur n'apparaît pas dans le classement des citations
+        "citations": sum(articles.values()) if articles else None,
+        "nombre_institutions": len(set(doc.get("institutions") or [])),
+        "articles": [{"titre": titre, "citations": citations} for titre, citations in ranked],
+    }
+
+def publication_key(doc: Dict) -> Dict:
+    return {"_id": doc["_id"], "auteurs": doc.get("auteurs") or [], "annee": to_year(doc.get("annee"))}
+
+async def apply_chercheurs(changes: Dict, suffix: str = "") -> int:
+    """Met à jour rollup_chercheurs : `changes` associe un _id au document (None = supprimé).
+
+    `suffix` désigne les collections temporaires d'un recalcul complet.
+    """
+    ops = [
+        ReplaceOne({"_id": doc_id}, chercheur_rollup(doc), upsert=True) if doc is not None else DeleteOne({"_id": doc_id})
+        for doc_id, doc in changes.items()
+    ]
+    if ops:
+        await db["rollup_chercheurs" + suffix].bulk_write(ops, ordered=False)
+    return len(ops)
+
+async def apply_publications(changes: Dict, suffix: str = "") -> int:
+    """Retranche l'ancienne contribution de chaque publication modifiée puis ajoute la nouvelle."""
+    if not changes:
+        return 0
+    deltas = Counter()
+    async for old in db["rollup_publication_keys" + suffix].find({"_id": {"$in": list(changes)}}):
+        if old["annee"] is not None:
+            for auteur in old["auteurs"]:
+                deltas[(auteur, old["annee"])] -= 1
+    key_ops = []
+    for doc_id, doc in changes.items():
+        if doc is None:
+            key_ops.append(DeleteOne({"_id": doc_id}))
+            continue
+        key = publication_key(doc)
+        if key["annee"] is not None:
+            for auteur in key["auteurs"]:
+                deltas[(auteur, key["annee"])] += 1
+        key_ops.append(ReplaceOne({"_id": doc_id}, key, upsert=True))
+    count_ops = [
+        UpdateOne({"auteur": auteur, "annee": annee}, {"$inc": {"nombre": delta}}, upsert=True)
+        for (auteur, annee), delta in deltas.items() if delta
+    ]
+    count_ops += [
+        DeleteMany({"auteur": auteur, "annee": annee, "nombre": {"$lte": 0}})
+        for (auteur, annee), delta in deltas.items() if delta < 0
+    ]
+    if count_ops:
+        await db["rollup_publications_auteur_annee" + suffix].bulk_write(count_ops, ordered=True)
+    await db["rollup_publication_keys" + suffix].bulk_write(key_ops, ordered=False)
+    return len(changes)
+
+ROLLUP_APPLY = {"chercheurs": apply_chercheurs, "publications": apply_publications}
+
+async def current_state(source: str) -> tuple:
+    """État de `source` lu dans MongoDB (sans le cache des versions)."""
+    version_cache.pop(source)
+    return await collection_state(source)
+
+async def save_watermark(source: str, state: tuple):
+    """Enregistre l'état (compteur, nombre, dernier _id) correspondant exactement aux documents appliqués."""
+    counter, count, last_id = state
+    # Le premier watermark rend les rollups lisibles (rollup_ready)
+    version_cache.pop(("rollup", source))
+    await db.rollup_state.update_one(
+        {"_id": source},
+        {"$set": {"counter": counter, "count": count, "last_id": last_id, "updated_at": datetime.utcnow()}},
+        upsert=True,
+    )
+
+async def rollups_changed(source: str):
+    for target in ROLLUP_TARGETS[source]:
+        await bump_version(target)
+
+async def rebuild_rollups(source: str) -> int:
+    """Recalcule entièrement les rollups d'une collection source.
+
+    Le calcul se fait dans des collections temporaires, substituées ensuite aux rollups
+    par renameCollection : les autres workers continuent de lire les anciens rollups
+    complets pendant le recalcul, jamais une collection vide ou partielle.
+    """
+    async with rollup_lock:
+        started = time.perf_counter()
+        # Relevé avant la lecture : les documents ajoutés pendant le recalcul restent au-delà du watermark
+        state = await current_state(source)
+        last_id = state[2]
+        for target in ROLLUP_TARGETS[source]:
+            staging = db[target + ROLLUP_STAGING_SUFFIX]
+            # Reste éventuel d'un recalcul interrompu ; créée même vide pour que le renommage aboutisse
+            await staging.drop()
+            await db.create_collection(staging.name)
+            for keys, options in INDEX_SPECS.get(target, []):
+                await staging.create_index(keys, name=index_name(keys), **options)
+        total = 0
+        batch = {}
+        # last_id None : collection vide au moment du relevé
+        query = {"_id": {"$lte": last_id}} if last_id is not None else {"_id": {"$exists": False}}
+        async for doc in db[source].find(query).batch_size(STREAM_BATCH_SIZE):
+            batch[doc["_id"]] = doc
+            if len(batch) >= STREAM_BATCH_SIZE:
+                total += await ROLLUP_APPLY[source](batch, ROLLUP_STAGING_SUFFIX)
+                batch = {}
+        total += await ROLLUP_APPLY[source](batch, ROLLUP_STAGING_SUFFIX)
+        for target in ROLLUP_TARGETS[source]:
+            await db[target + ROLLUP_STAGING_SUFFIX].rename(target, dropTarget=True)
+        await save_watermark(source, state)
+        await rollups_changed(source)
+        log(logging.INFO, "rollups_rebuilt", source=source, documents=total,
+            seconds=round(time.perf_counter() - started, 3))
+        return total
+
+async def poll_source(source: str) -> int:
+    """Applique les documents ajoutés depuis le watermark ; recalcule tout si la collection a été modifiée autrement."""
+    stored = await db.rollup_state.find_one({"_id": source})
+    state = await current_state(source)
+    counter, count, last_id = state
+    if stored is None or stored.get("counter") != counter:
+        return await rebuild_rollups(source)
+    if (stored["count"], stored["last_id"]) == (count, last_id):
+        return 0
+    # Bornée par l'état relevé : les documents insérés depuis seront lus au prochain passage
+    query = {"_id": {"$lte": last_id}}
+    if stored["last_id"] is not None:
+        query["_id"]["$gt"] = stored["last_id"]
+    appended = {doc["_id"]: doc async for doc in db[source].find(query)}
+    if stored["count"] + len(appended) != count:
+        # Suppressions ou écritures hors watermark : le delta n'est pas fiable
+        return await rebuild_rollups(source)
+    async with rollup_lock:
+        await ROLLUP_APPLY[source](appended)
+        await save_watermark(source, state)
+        await rollups_changed(source)
+    return len(appended)
+
+async def watch_changes():
+    """Applique les changements de chercheurs et publications au fil du change stream."""
+    saved = await db.rollup_state.find_one({"_id": "change_stream"})
+    async with db.watch(ROLLUP_STREAM_PIPELINE, full_document="updateLookup",
+                        resume_after=saved["token"] if saved else None) as stream:
+        if saved is None:
+            for source in ROLLUP_SOURCES:
+                await rebuild_rollups(source)
+        log(logging.INFO, "materializer_change_stream")
+        async for change in stream:
+            source = change["ns"]["coll"]
+            if change["operationType"] in ("drop", "rename", "invalidate"):
+                await rebuild_rollups(source)
+            else:
+                # fullDocument est absent (supprimé) ou None si le document a disparu depuis
+                async with rollup_lock:
+                    await ROLLUP_APPLY[source]({change["documentKey"]["_id"]: change.get("fullDocument")})
+                await rollups_changed(source)
+            await db.rollup_state.update_one(
+                {"_id": "change_stream"}, {"$set": {"token": stream.resume_token}}, upsert=True
+            )
+
+async def run_materializer():
+    mode = ROLLUP_MODE
+    while True:
+        try:
+            if mode in ("stream", "auto"):
+                await watch_changes()
+            else:
+                for source in ROLLUP_SOURCES:
+                    await poll_source(source)
+                await asyncio.sleep(ROLLUP_POLL_INTERVAL)
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            if e.code == CHANGE_STREAM_UNSUPPORTED and mode == "auto":
+                log(logging.WARNING, "materializer_polling", reason="change_streams_unavailable")
+                mode = "poll"
+                continue
+            if e.code == CHANGE_STREAM_HISTORY_LOST:
+                log(logging.WARNING, "materializer_history_lost")
+                await db.rollup_state.delete_one({"_id": "change_stream"})
+                continue
+            log(logging.ERROR, "materializer_error", error=str(e))
+            await asyncio.sleep(ROLLUP_POLL_INTERVAL)
+        except PyMongoError as e:
+            log(logging.ERROR, "materializer_error", error=str(e))
+            await asyncio.sleep(ROLLUP_POLL_INTERVAL)
+
+async def acquire_materializer_lease() -> bool:
+    """Prend ou renouvelle le bail du matérialiseur (False s'il est détenu par un autre worker)."""
+    now = datetime.utcnow()
+    try:
+        await db.rollup_state.update_one(
+            {"_id": "materializer_lease", "$or": [{"owner": worker_id}, {"expires_at": {"$lt": now}}]},
+            {"$set": {"owner": worker_id, "expires_at": now + timedelta(seconds=MATERIALIZER_LEASE_SECONDS)}},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+async def hold_materializer():
+    """Fait tourner le matérialiseur tant que ce worker détient le bail, sinon attend qu'il expire."""
+    while True:
+        try:
+            if await acquire_materializer_lease():
+                log(logging.INFO, "materializer_lease_acquired", worker=worker_id)
+                task = asyncio.create_task(run_materializer())
+                try:
+                    while not task.done():
+                        await asyncio.sleep(MATERIALIZER_LEASE_SECONDS / 3)
+                        if not await acquire_materializer_lease():
+                            log(logging.WARNING, "materializer_lease_lost", worker=worker_id)
+                            break
+                finally:
+                    task.cancel()
+        except PyMongoError as e:
+            log(logging.ERROR, "materializer_error", error=str(e))
+        await asyncio.sleep(MATERIALIZER_LEASE_SECONDS / 3)
+
+@app.on_event("startup")
+async def start_materializer():
+    global materializer_task
+    if ROLLUP_MODE != "off":
+        materializer_task = asyncio.create_task(hold_materializer())
+
+@app.on_event("shutdown")
+async def stop_materializer():
+    if materializer_task is not None:
+        materializer_task.cancel()
+        # Libère le bail pour qu'un autre worker reprenne sans attendre son expiration
+        try:
+            await db.rollup_state.delete_one({"_id": "materializer_lease", "owner": worker_id})
+        except PyMongoError:
+            pass
+
+# Enregistré après l'arrêt du matérialiseur : les hooks d'arrêt s'exécutent dans l'ordre
+@app.on_event("shutdown")
+async def shutdown_db_client():
+    global client
+    if client is not None:
+        client.close()
+        client = None
+
+async def rollup_ready(source: str) -> bool:
+    """Les rollups d'une source sont lisibles une fois leur premier calcul terminé."""
+    if ROLLUP_MODE == "off":
+        return False
+    ready = version_cache.get(("rollup", source))
+    if ready is None:
+        ready = await db.rollup_state.find_one({"_id": source}, {"_id": 1}) is not None
+        version_cache.set(("rollup", source), ready)
+    return ready
+
+async def citations_chercheurs_source(n: Optional[int]) -> tuple:
+    """(collections lues, producteur) du total des citations par chercheur."""
+    if await rollup_ready("chercheurs"):
+        async def produce():
+            cursor = read_db.rollup_chercheurs.find(
+                {"citations": {"$ne": None}}, {"_id": 0, "chercheur": 1, "citations": 1}
+            ).sort([("citations", DESCENDING), ("chercheur", ASCENDING)]).limit(n or 0)
+            return await cursor.to_list(None)
+        return ["rollup_chercheurs"], produce
+    pipeline = [
+        {"$unwind": "$publications"},
+        {"$match": CITED_PUBLICATION_MATCH},
+        {"$group": {"_id": "$nom", "citations": {"$sum": "$publications.citations"}}},
+        {"$sort": {"citations": -1, "_id": 1}},
+    ]
+    if n:
+        pipeline.append({"$limit": n})
+    pipeline.append({"$project": {"_id": 0, "chercheur": "$_id", "citations": 1}})
+    return ["chercheurs"], lambda: run_pipeline(read_db.chercheurs, pipeline)
+
+@app.get("/api/aggregations/citations_chercheurs", response_model=List[Dict], response_class=FastJSONResponse)
+async def get_citations_chercheurs(request: Request, n: Optional[int] = Query(None, ge=1),
+                                   token: dict = Depends(verify_token)):
+    """Total des citations par chercheur, trié par ordre décroissant."""
+    collections, produce = await citations_chercheurs_source(n)
+    return await cached_response(request, collections, produce)
+
+async def top_articles_source(n: int, chercheur: Optional[str] = None) -> tuple:
+    """(collections lues, producteur) des `n` articles les plus cités par chercheur."""
+    if await rollup_ready("chercheurs"):
+        query = {"chercheur": chercheur} if chercheur else {"articles.0": {"$exists": True}}
+
+        async def produce():
+            cursor = read_db.rollup_chercheurs.find(
+                query, {"_id": 0, "chercheur": 1, "articles": {"$slice": n}}
+            ).sort("chercheur", ASCENDING)
+            return [
+                {"chercheur": doc["chercheur"], **article}
+                async for doc in cursor for article in doc["articles"]
+            ]
+        return ["rollup_chercheurs"], produce
+    pipeline = [{"$match": {"nom": chercheur}}] if chercheur else []
+    pipeline += [
+        {"$unwind": "$publications"},
+        {"$match": CITED_PUBLICATION_MATCH},
+        {"$group": {
+            "_id": {"chercheur": "$nom", "titre": "$publications.titre"},
+            "citations": {"$sum": "$publications.citations"},
+        }},
+        {"$sort": {"_id.chercheur": 1, "citations": -1}},
+        {"$group": {
+            "_id": "$_id.chercheur",
+            "articles": {"$push": {"titre": "$_id.titre", "citations": "$citations"}},
+        }},
+        {"$project": {"articles": {"$slice": ["$articles", n]}}},
+        {"$unwind": "$articles"},
+        {"$project": {
+            "_id": 0,
+            "chercheur": "$_id",
+            "titre": "$articles.titre",
+            "citations": "$articles.citations",
+        }},
+        {"$sort": {"chercheur": 1, "citations": -1}},
+    ]
+    return ["chercheurs"], lambda: run_pipeline(read_db.chercheurs, pipeline)
+
+@app.get("/api/aggregations/top_articles", response_model=List[Dict], response_class=FastJSONResponse)
+async def get_top_articles(request: Request, n: int = Query(5, ge=1, le=ROLLUP_TOP_ARTICLES),
+                           chercheur: Optional[str] = None, token: dict = Depends(verify_token)):
+    """Les `n` articles les plus cités de chaque chercheur (ou d'un seul chercheur)."""
+    collections, produce = await top_articles_source(n, chercheur)
+    return await cached_response(request, collections, produce)
+
+@app.get("/api/aggregations/publications_auteur_annee", response_model=List[Dict], response_class=FastJSONResponse)
+async def get_publications_auteur_annee(request: Request, auteur: Optional[str] = None,
+                                        start_year: Optional[int] = None,
+                                        end_year: Optional[int] = None,
+                                        token: dict = Depends(verify_token)):
+    """Nombre de publications par auteur et par année."""
+    year_range = {"$ne": None}
+    if start_year is not None:
+        year_range["$gte"] = start_year
+    if end_year is not None:
+        year_range["$lte"] = end_year
+    if await rollup_ready("publications"):
+        query = {"annee": year_range}
+        if auteur:
+            query["auteur"] = auteur
+        cursor = read_db.rollup_publications_auteur_annee.find(
+            query, {"_id": 0, "auteur": 1, "annee": 1, "nombre": 1}
+        ).sort([("auteur", ASCENDING), ("annee", ASCENDING)])
+        return await cached_response(request, ["rollup_publications_auteur_annee"], lambda: cursor.to_list(None))
+    pipeline = [{"$match": {"auteurs": auteur}}] if auteur else []
+    pipeline += [
+        {"$project": {"_id": 0, "auteurs": 1, "annee": year_expr("$annee")}},
+        {"$match": {"annee": year_range}},
+        {"$unwind": "$auteurs"},
+    ]
+    if auteur:
+        pipeline.append({"$match": {"auteurs": auteur}})
+    pipeline += [
+        {"$group": {"_id": {"auteur": "$auteurs", "annee": "$annee"}, "nombre": {"$sum": 1}}},
+        {"$project": {"_id": 0, "auteur": "$_id.auteur", "annee": "$_id.annee", "nombre": 1}},
+        {"$sort": {"auteur": 1, "annee": 1}},
+    ]
+    return await cached_response(request, ["publications"], lambda: run_pipeline(read_db.publications, pipeline))
+
+@app.get("/api/aggregations/institutions_chercheurs", response_model=List[Dict], response_class=FastJSONResponse)
+async def get_institutions_chercheurs(request: Request, token: dict = Depends(verify_token)):
+    """Nombre d'institutions distinctes de chaque chercheur rattaché à au moins une institution."""
+    if await rollup_ready("chercheurs"):
+        cursor = read_db.rollup_chercheurs.find(
+            {"nombre_institutions": {"$gt": 0}}, {"_id": 0, "chercheur": 1, "nombre_institutions": 1}
+        ).sort("chercheur", ASCENDING)
+        return await cached_response(request, ["rollup_chercheurs"], lambda: cursor.to_list(None))
+    pipeline = [
+        {"$project": {
+            "_id": 0,
+            "chercheur": "$nom",
+            "nombre_institutions": {"$size": {"$setUnion": [{"$ifNull": ["$institutions", []]}, []]}},
+        }},
+        {"$match": {"nombre_institutions": {"$gt": 0}}},
+        {"$sort": {"chercheur": 1}},
+    ]
+    return await cached_response(request, ["chercheurs"], lambda: run_pipeline(read_db.chercheurs, pipeline))
+
+@app.get("/api/aggregations/top_pays_annee", response_model=List[Dict], response_class=FastJSONResponse)
+async def get_top_pays_annee(request: Request, n: int = Query(5, ge=1, le=100), annee: Optional[int] = None,
+                             exclude: List[str] = Query([]), token: dict = Depends(verify_token)):
+    """Les `n` pays ayant le plus de publications pour chaque année."""
+    match = {}
+    if annee is not None:
+        match["annee"] = {"$in": year_variants(annee)}
+    if exclude:
+        match["pays"] = {"$nin": exclude}
+    pipeline = [{"$match": match}] if match else []
+    pipeline += [
+        {"$project": {"_id": 0, "pays": 1, "nombre_publications": 1, "annee": year_expr("$annee")}},
+        {"$sort": {"annee": 1, "nombre_publications": -1}},
+        {"$group": {
+            "_id": "$annee",
+            "pays": {"$push": {"pays": "$pays", "nombre_publications": "$nombre_publications"}},
+        }},
+        {"$project": {"pays": {"$slice": ["$pays", n]}}},
+        {"$unwind": "$pays"},
+        {"$project": {
+            "_id": 0,
+            "annee": "$_id",
+            "pays": "$pays.pays",
+            "nombre_publications": "$pays.nombre_publications",
+        }},
+        {"$sort": {"annee": 1, "nombre_publications": -1}},
+    ]
+    return await cached_response(request, ["stats_pays"], lambda: run_pipeline(read_db.stats_pays, pipeline))
+
+# Données initiales du dashboard en une requête
+BOOTSTRAP_FORMAT = 1  # incrémenté à chaque changement de structure du payload
+BOOTSTRAP_TOP_ARTICLES = 5
+BOOTSTRAP_TOP_CHERCHEURS = 3
+
+async def bootstrap_stats_years() -> List[int]:
+    years = {to_year(annee) for annee in await read_db.stats_pays.distinct("annee")}
+    return sorted(year for year in years if year is not None)
+
+async def bootstrap_publication_years() -> List[int]:
+    # Bornes du filtre de période : années des publications ayant au moins un auteur
+    years = {to_year(annee) for annee in await read_db.publications.distinct("annee", {"auteurs.0": {"$exists": True}})}
+    return sorted(year for year in years if year is not None)
+
+async def bootstrap_chercheurs() -> List[Dict]:
+    # Institutions (Sankey, Top Universités) et années de publication triées (nombre de publications par période)
+    cursor = read_db.chercheurs.find({}, {"_id": 0, "nom": 1, "institutions": 1, "publications.annee": 1})
+    chercheurs = []
+    async for doc in cursor:
+        if not doc.get("nom"):
+            continue
+        annees = (to_year(publication.get("annee")) for publication in doc.get("publications") or [])
+        chercheurs.append({
+            "nom": doc["nom"],
+            "institutions": doc.get("institutions") or [],
+            "annees": sorted(annee for annee in annees if annee is not None),
+        })
+    return chercheurs
+
+def dictionary_encode_bootstrap(payload: Dict) -> Dict:
+    """Remplace les noms de chercheurs et d'institutions par leur indice dans `dictionnaires`.
+
+    Chaque nom n'est transmis qu'une fois, dans l'ordre de première apparition.
+    """
+    chercheurs, institutions = {}, {}
+
+    def chercheur(nom: str) -> int:
+        return chercheurs.setdefault(nom, len(chercheurs))
+
+    def institution(nom: str) -> int:
+        return institutions.setdefault(nom, len(institutions))
+
+    return {
+        **payload,
+        "encoding": "dict",
+        "chercheurs": [
+            {**doc, "nom": chercheur(doc["nom"]), "institutions": [institution(nom) for nom in doc["institutions"]]}
+            for doc in payload["chercheurs"]
+        ],
+        "collaborations": [[chercheur(first), chercheur(second), poids] for first, second, poids in payload["collaborations"]],
+        # Les chercheurs sans nom n'ont pas d'entrée dans la table
+        "top_articles": [
+            {**doc, "chercheur": chercheur(doc["chercheur"])} for doc in payload["top_articles"] if doc.get("chercheur")
+        ],
+        "top_chercheurs": [
+            {**doc, "chercheur": chercheur(doc["chercheur"])} for doc in payload["top_chercheurs"] if doc.get("chercheur")
+        ],
+        "dictionnaires": {"chercheurs": list(chercheurs), "institutions": list(institutions)},
+    }
+
+@app.get("/api/dashboard/bootstrap", response_model=Dict)
+async def get_dashboard_bootstrap(request: Request, encoding: str = Query("plain", pattern="^(plain|dict)$"),
+                                  token: dict = Depends(verify_token)):
+    """Tout ce que le dashboard charge au démarrage, requêtes MongoDB lancées en parallèle.
+
+    `collaborations` : triplets [chercheur1, chercheur2, poids]. L'ETag couvre toutes
+    les collections lues : le client revalide le payload complet avec If-None-Match.
+    `encoding=dict` : noms remplacés par des indices dans les tables `dictionnaires`.
+    """
+    citations_collections, top_chercheurs = await citations_chercheurs_source(BOOTSTRAP_TOP_CHERCHEURS)
+    articles_collections, top_articles = await top_articles_source(BOOTSTRAP_TOP_ARTICLES)
+    collections = sorted({
+        "stats_pays", "publications", "chercheurs", "collaborations", *citations_collections, *articles_collections,
+    })
+
+    async def produce():
+        stats_years, publication_years, chercheurs, edges, articles, citations = await asyncio.gather(
+            bootstrap_stats_years(), bootstrap_publication_years(), bootstrap_chercheurs(), load_collaboration_edges(),
+            top_articles(), top_chercheurs(),
+        )
+        payload = {
+            "format": BOOTSTRAP_FORMAT,
+            "encoding": "plain",
+            "stats_years": stats_years,
+            "publication_years": publication_years,
+            "chercheurs": chercheurs,
+            "collaborations": edges,
+            "top_articles": articles,
+            "top_chercheurs": citations,
+        }
+        return dictionary_encode_bootstrap(payload) if encoding == "dict" else payload
+    return await cached_response(request, collections, produce)
+
+# Recherche plein texte dans les publications et suggestions par préfixe sur les noms
+SEARCH_MAX_LIMIT = 100
+SEARCH_FACET_SIZE = 20
+SEARCH_PROJECTION = {"_id": 0, "titre": 1, "auteurs": 1, "annee": 1, "citations": 1, "institutions": 1}
+# Types de noms proposés par /api/search/suggest, dans l'ordre d'affichage
+SUGGEST_KINDS = ("chercheur", "institution", "auteur")
+
+def fold(text: str) -> str:
+    """Forme de comparaison d'un nom : minuscules, sans accents."""
+    return "".join(char for char in unicodedata.normalize("NFKD", text.casefold()) if not unicodedata.combining(char))
+
+class SuggestIndex:
+    """Noms de chercheurs, d'institutions et d'auteurs triés pour la recherche par préfixe.
+
+    Chaque nom est indexé à partir de chacun de ses mots ("mian" trouve "Ammar Mian") ;
+    une recherche est une dichotomie suivie de la lecture des seules entrées correspondantes.
+    Reconstruit quand la version d'une des collections sources change.
+    """
+
+    SOURCES = ("chercheurs", "institutions", "publications")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.versions = None
+        self.keys = {kind: [] for kind in SUGGEST_KINDS}
+        self.names = {kind: [] for kind in SUGGEST_KINDS}
+
+    async def refresh(self):
+        versions = [await collection_version(name) for name in self.SOURCES]
+        if versions == self.versions:
+            return self
+        async with self.lock:
+            if versions == self.versions:
+                return self
+            values = {
+                "chercheur": await read_db.chercheurs.distinct("nom"),
+                "institution": await read_db.institutions.distinct("nom"),
+                # $group plutôt que distinct : le résultat n'est pas limité à 16 Mo
+                "auteur": [doc["_id"] async for doc in read_db.publications.aggregate(
+                    [{"$unwind": "$auteurs"}, {"$group": {"_id": "$auteurs"}}]
+                )],
+            }
+            for kind, names in values.items():
+                self.keys[kind], self.names[kind] = await asyncio.to_thread(self.build, names)
+            self.versions = versions
+        return self
+
+    @staticmethod
+    def build(names: List[str]) -> tuple:
+        entries = set()
+        for name in names:
+            if not isinstance(name, str) or not name.strip():
+                continue
+            folded = fold(name)
+            for word in re.finditer(r"\w+", folded):
+                entries.add((folded[word.start():], name))
+        entries = sorted(entries)
+        return [key for key, _ in entries], [name for _, name in entries]
+
+    def suggest(self, prefix: str, kinds: List[str], limit: int) -> List[Dict]:
+        prefix = fold(prefix.strip())
+        results = []
+        for kind in kinds:
+            keys, names = self.keys[kind], self.names[kind]
+            seen = set()
+            index = bisect_left(keys, prefix)
+            while index < len(keys) and keys[index].startswith(prefix) and len(results) < limit:
+                if names[index] not in seen:
+                    seen.add(names[index])
+                    results.append({"nom": names[index], "type": kind})
+                index += 1
+        return results
+
+suggest_index = SuggestIndex()
+
+@app.get("/api/search/suggest", response_model=List[Dict], response_class=FastJSONResponse)
+async def search_suggest(q: str = Query(..., min_length=1, max_length=100),
+                         kinds: List[str] = Query([], alias="type"),
+                         limit: int = Query(10, ge=1, le=SEARCH_MAX_LIMIT),
+                         token: dict = Depends(verify_token)):
+    """Noms commençant par `q` (ou dont un mot commence par `q`), pour l'autocomplétion."""
+    unknown = set(kinds) - set(SUGGEST_KINDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Types inconnus : {', '.join(sorted(unknown))}")
+    index = await suggest_index.refresh()
+    return index.suggest(q, [kind for kind in SUGGEST_KINDS if not kinds or kind in kinds], limit)
+
+@app.get("/api/search", response_model=Dict)
+async def search(request: Request, q: Optional[str] = Query(None, max_length=200),
+                 start_year: Optional[int] = None, end_year: Optional[int] = None,
+                 pays: Optional[str] = None, institution: Optional[str] = None, auteur: Optional[str] = None,
+                 limit: int = Query(20, ge=1, le=SEARCH_MAX_LIMIT), offset: int = Query(0, ge=0),
+                 token: dict = Depends(verify_token)):
+    """Recherche dans les titres, auteurs et institutions des publications, avec facettes.
+
+    `q` utilise l'index texte (mots entiers, insensible à la casse et aux accents) ;
+    les facettes (années, pays, institutions) portent sur l'ensemble des résultats.
+    """
+    match = {}
+    if q and q.strip():
+        match["$text"] = {"$search": q}
+    filters = []
+    if institution:
+        filters.append({"institutions": institution})
+    if pays:
+        countries = await institution_countries()
+        filters.append({"institutions": {"$in": [nom for nom, country in countries.items() if country == pays]}})
+    if auteur:
+        filters.append({"auteurs": auteur})
+    if filters:
+        match["$and"] = filters
+    year_range = {}
+    if start_year is not None:
+        year_range["$gte"] = start_year
+    if end_year is not None:
+        year_range["$lte"] = end_year
+
+    fields = {"annee": year_expr("$annee")}
+    if "$text" in match:
+        fields["score"] = {"$meta": "textScore"}
+    pipeline = [{"$match": match}, {"$addFields": fields}]
+    if year_range:
+        pipeline.append({"$match": {"annee": year_range}})
+    pipeline.append({"$facet": {
+        "resultats": [
+            {"$sort": {"score": -1, "annee": -1} if "$text" in match else {"annee": -1, "_id": 1}},
+            {"$skip": offset},
+            {"$limit": limit},
+            {"$project": {**SEARCH_PROJECTION, **({"score": 1} if "$text" in match else {})}},
+        ],
+        "total": [{"$count": "nombre"}],
+        "annees": [
+            {"$match": {"annee": {"$ne": None}}},
+            {"$group": {"_id": "$annee", "nombre": {"$sum": 1}}},
+            {"$sort": {"_id": -1}},
+        ],
+        "institutions": [
+            {"$unwind": "$institutions"},
+            {"$group": {"_id": "$institutions", "nombre": {"$sum": 1}}},
+            {"$sort": {"nombre": -1, "_id": 1}},
+            {"$limit": SEARCH_FACET_SIZE},
+        ],
+        "pays": [
+            {"$project": {"institutions": 1}},
+            {"$unwind": "$institutions"},
+            {"$lookup": {"from": "institutions", "localField": "institutions", "foreignField": "nom", "as": "institution"}},
+            {"$unwind": "$institution"},
+            {"$group": {"_id": {"pays": {"$toLower": "$institution.pays"}, "publication": "$_id"}}},
+            {"$group": {"_id": "$_id.pays", "nombre": {"$sum": 1}}},
+        ],
+    }})
+
+    async def produce():
+        facets = (await run_pipeline(read_db.publications, pipeline))[0]
+        countries = Counter()
+        for bucket in facets["pays"]:
+            name = country_name(bucket["_id"])
+            if name:
+                countries[name] += bucket["nombre"]
+        return {
+            "total": facets["total"][0]["nombre"] if facets["total"] else 0,
+            "limit": limit,
+            "offset": offset,
+            "resultats": facets["resultats"],
+            "facettes": {
+                "annees": [{"annee": bucket["_id"], "nombre": bucket["nombre"]} for bucket in facets["annees"]],
+                "pays": [{"pays": name, "nombre": nombre} for name, nombre in countries.most_common(SEARCH_FACET_SIZE)],
+                "institutions": [
+                    {"institution": bucket["_id"], "nombre": bucket["nombre"]} for bucket in facets["institutions"]
+                ],
+            },
+        }
+    return await cached_response(request, ["publications", "institutions"], produce)
+
+# Données dérivées des publications : collaborations (paires de co-auteurs) et stats_pays
+# Noms utilisés par stats_pays quand ils diffèrent de pycountry
+COUNTRY_NAMES = {"ru": "Russia", "kr": "South Korea"}
+
+def country_name(code: Optional[str]) -> Optional[str]:
+    if not code:
+        return None
+    code = code.strip().lower()
+    if code in COUNTRY_NAMES:
+        return COUNTRY_NAMES[code]
+    country = pycountry.countries.get(alpha_2=code.upper()) if pycountry is not None else None
+    if country is None:
+        return code.upper()
+    return getattr(country, "common_name", country.name)
+
+country_cache = BoundedCache(4, RESPONSE_CACHE_TTL)
+
+async def institution_countries() -> Dict[str, str]:
+    """Nom d'institution -> nom du pays tel qu'il apparaît dans stats_pays (par version d'institutions)."""
+    version = await collection_version("institutions")
+    countries = country_cache.get(version)
+    if countries is None:
+        countries = {
+            doc["nom"]: country_name(doc.get("pays"))
+            async for doc in read_db.institutions.find({"pays": {"$nin": [None, ""]}}, {"_id": 0, "nom": 1, "pays": 1})
+        }
+        country_cache.set(version, countries)
+    return countries
+
+def derive_publications(publications: List[Dict], chercheurs: set, country_of: Dict[str, str],
+                        authors: Optional[set] = None, years: Optional[set] = None) -> tuple:
+    """Contributions d'un lot de publications : (paires de chercheurs, compteurs (pays, année)).
+
+    Seuls les co-auteurs présents dans `chercheurs` forment une collaboration.
+    `authors` et `years` restreignent le calcul aux paires et années touchées.
+    """
+    pairs = {}
+    counts = Counter()
+    for publication in publications:
+        year = to_year(publication.get("annee"))
+        members = sorted({auteur for auteur in publication.get("auteurs") or [] if auteur in chercheurs})
+        for pair in combinations(members, 2):
+            if authors is not None and not authors.intersection(pair):
+                continue
+            stats = pairs.setdefault(pair, {"poids": 0, "publications": [], "annees": []})
+            stats["poids"] += 1
+            stats["publications"].append(publication.get("titre"))
+            if year is not None:
+                stats["annees"].append(year)
+        if year is None or (years is not None and year not in years):
+            continue
+        for pays in {country_of[name] for name in publication.get("institutions") or [] if name in country_of}:
+            counts[(pays, year)] += 1
+    return pairs, counts
+
+async def write_collaborations(pairs: Dict, collection: str, authors: Optional[set] = None) -> int:
+    """Remplace dans `collection` les collaborations dont un membre est dans `authors` (toutes si None).
+
+    Les paires que la dérivation ne retrouve plus sont supprimées : `collection` est
+    une collection dérivée (DERIVED_COLLECTIONS), jamais une collection d'origine.
+    """
+    # date_creation au format des collections d'origine (chaîne ISO 8601)
+    now = datetime.now().isoformat()
+    query = {} if authors is None else {
+        "$or": [{"chercheur1": {"$in": list(authors)}}, {"chercheur2": {"$in": list(authors)}}]
+    }
+    remaining = dict(pairs)
+    ops = []
+    async for doc in db[collection].find(query, {"chercheur1": 1, "chercheur2": 1}):
+        stats = remaining.pop(tuple(sorted((doc.get("chercheur1") or "", doc.get("chercheur2") or ""))), None)
+        if stats is None:
+            ops.append(DeleteOne({"_id": doc["_id"]}))
+        else:
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": collaboration_fields(stats)}))
+    for (chercheur1, chercheur2), stats in remaining.items():
+        ops.append(InsertOne({
+            "chercheur1": chercheur1,
+            "chercheur2": chercheur2,
+            **collaboration_fields(stats),
+            "date_creation": now,
+        }))
+    if ops:
+        await db[collection].bulk_write(ops, ordered=False)
+    return len(ops)
+
+def collaboration_fields(stats: Dict) -> Dict:
+    return {
+        "poids": stats["poids"],
+        "publications": list(dict.fromkeys(stats["publications"])),
+        "premiere_collaboration": min(stats["annees"], default=None),
+        "derniere_collaboration": max(stats["annees"], default=None),
+    }
+
+async def write_stats_pays(counts: Counter, collection: str, years: Optional[set] = None) -> int:
+    """Remplace dans `collection` (dérivée) les lignes de stats_pays des années `years` (toutes si None)."""
+    now = datetime.now().isoformat()
+    query = {} if years is None else {"annee": {"$in": [value for year in years for value in year_variants(year)]}}
+    remaining = Counter(counts)
+    ops = []
+    async for doc in db[collection].find(query, {"pays": 1, "annee": 1}):
+        nombre = remaining.pop((doc.get("pays"), to_year(doc.get("annee"))), None)
+        if nombre is None:
+            ops.append(DeleteOne({"_id": doc["_id"]}))
+        else:
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"nombre_publications": nombre}}))
+    for (pays, year), nombre in remaining.items():
+        ops.append(InsertOne({
+            "pays": pays,
+            "annee": str(year),
+            "nombre_publications": nombre,
+            "nombre_chercheurs": None,
+            "nombre_citations": None,
+            "principales_institutions": [],
+            "date_creation": now,
+        }))
+    if ops:
+        await db[collection].bulk_write(ops, ordered=False)
+    return len(ops)
+
+def merge_derived(pairs: Dict, counts: Counter, part: tuple):
+    """Ajoute à `pairs` et `counts` le résultat de `derive_publications` sur un lot."""
+    part_pairs, part_counts = part
+    for pair, stats in part_pairs.items():
+        merged = pairs.setdefault(pair, {"poids": 0, "publications": [], "annees": []})
+        merged["poids"] += stats["poids"]
+        merged["publications"] += stats["publications"]
+        merged["annees"] += stats["annees"]
+    counts.update(part_counts)
+
+def add_touched(touched: Dict, publications: List[Dict]):
+    """Ajoute les auteurs et années d'un lot de publications à recalculer."""
+    for publication in publications:
+        touched["authors"].update(publication.get("auteurs") or [])
+        year = to_year(publication.get("annee"))
+        if year is not None:
+            touched["years"].add(year)
+
+DERIVE_PROJECTION = {"_id": 0, "titre": 1, "auteurs": 1, "annee": 1, "institutions": 1}
+# Cibles des dérivations complète et incrémentale : les collections d'origine ne sont pas
+# reproduites par cette méthode (poids et effectifs différents), elles ne sont jamais modifiées
+DERIVED_COLLECTIONS = {"collaborations": "derived_collaborations", "stats_pays": "derived_stats_pays"}
+derive_lock = asyncio.Lock()
+
+async def save_derived_watermark(last_id: Optional[ObjectId]):
+    await db.rollup_state.update_one(
+        {"_id": "derived"}, {"$set": {"last_id": last_id, "updated_at": datetime.utcnow()}}, upsert=True
+    )
+
+async def refresh_derived(authors: set, years: set) -> Dict[str, int]:
+    """Recalcule dans DERIVED_COLLECTIONS les collaborations de `authors` et les stats_pays de `years`.
+
+    Appelé sous derive_lock.
+    """
+    chercheurs = set(await db.chercheurs.distinct("nom"))
+    authors = authors & chercheurs
+    if not authors and not years:
+        return {name: 0 for name in DERIVED_COLLECTIONS.values()}
+    country_of = await institution_countries() if years else {}
+    clauses = []
+    if authors:
+        clauses.append({"auteurs": {"$in": list(authors)}})
+    if years:
+        clauses.append({"annee": {"$in": [value for year in years for value in year_variants(year)]}})
+    publications = await db.publications.find({"$or": clauses}, DERIVE_PROJECTION).to_list(None)
+    pairs, counts = derive_publications(publications, chercheurs, country_of, authors=authors, years=years)
+    collaborations, stats_pays = DERIVED_COLLECTIONS["collaborations"], DERIVED_COLLECTIONS["stats_pays"]
+    written = {
+        collaborations: await write_collaborations(pairs, collaborations, authors) if authors else 0,
+        stats_pays: await write_stats_pays(counts, stats_pays, years) if years else 0,
+    }
+    for name, count in written.items():
+        if count:
+            await bump_version(name)
+    return written
+
+async def derive_all() -> Dict:
+    """Recalcule entièrement collaborations et stats_pays dans DERIVED_COLLECTIONS.
+
+    Les publications sont lues par lots de DERIVE_SHARD_SIZE, chaque lot est traité
+    dans un processus du pool (`derive_publications`) et fusionné dès qu'il est terminé ;
+    au plus DERIVE_IN_FLIGHT lots sont en attente à la fois. Le watermark partagé avec
+    la dérivation incrémentale est la dernière publication présente au début du calcul.
+    """
+    async with derive_lock:
+        started = time.perf_counter()
+        # Relevé avant la lecture : les publications ajoutées pendant le calcul restent au-delà du watermark
+        last = await db.publications.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        last_id = last["_id"] if last else None
+        query = {"_id": {"$lte": last_id}} if last_id is not None else {}
+        chercheurs = set(await db.chercheurs.distinct("nom"))
+        country_of = await institution_countries()
+        loop = asyncio.get_running_loop()
+        pairs, counts = {}, Counter()
+        pending, shard, total, shards = set(), [], 0, 0
+
+        async def drain(limit: int):
+            # Fusionne les lots terminés jusqu'à en avoir au plus `limit` en cours
+            nonlocal pending
+            while len(pending) > limit:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    merge_derived(pairs, counts, future.result())
+
+        # spawn : un fork hériterait des threads du serveur (client Motor, logs, bcrypt) et de leurs verrous
+        with ProcessPoolExecutor(max_workers=DERIVE_WORKERS, mp_context=multiprocessing.get_context("spawn")) as pool:
+            # Les lots partent vers le pool pendant la lecture des suivants
+            async for doc in db.publications.find(query, DERIVE_PROJECTION).batch_size(STREAM_BATCH_SIZE):
+                shard.append(doc)
+                if len(shard) >= DERIVE_SHARD_SIZE:
+                    await drain(DERIVE_IN_FLIGHT - 1)
+                    pending.add(loop.run_in_executor(pool, derive_publications, shard, chercheurs, country_of))
+                    total, shards, shard = total + len(shard), shards + 1, []
+            if shard:
+                await drain(DERIVE_IN_FLIGHT - 1)
+                pending.add(loop.run_in_executor(pool, derive_publications, shard, chercheurs, country_of))
+                total, shards = total + len(shard), shards + 1
+            await drain(0)
+        collaborations, stats_pays = DERIVED_COLLECTIONS["collaborations"], DERIVED_COLLECTIONS["stats_pays"]
+        written = {
+            collaborations: await write_collaborations(pairs, collaborations),
+            stats_pays: await write_stats_pays(counts, stats_pays),
+        }
+        for name, count in written.items():
+            if count:
+                await bump_version(name)
+        await save_derived_watermark(last_id)
+        elapsed = time.perf_counter() - started
+        log(logging.INFO, "derived_collections", publications=total, seconds=round(elapsed, 3))
+        return {"mode": "full", "publications": total, "shards": shards, **written, "seconds": round(elapsed, 3)}
+
+async def derive_incremental(touched: Optional[Dict] = None) -> Dict:
+    """Recalcule dans DERIVED_COLLECTIONS les paires et années des publications ajoutées depuis le watermark.
+
+    `touched` : auteurs et années d'une ingestion (publications modifiées en place), recalculés en plus.
+    Sans dérivation complète préalable, les collections dérivées sont vides : la dérivation complète est lancée.
+    """
+    async with derive_lock:
+        state = await db.rollup_state.find_one({"_id": "derived"})
+        if state is not None:
+            started = time.perf_counter()
+            query = {"_id": {"$gt": state["last_id"]}} if state["last_id"] is not None else {}
+            publications = await db.publications.find(query, {"auteurs": 1, "annee": 1}).sort("_id", 1).to_list(None)
+            touched = {
+                "authors": set(touched["authors"]) if touched else set(),
+                "years": set(touched["years"]) if touched else set(),
+            }
+            add_touched(touched, publications)
+            written = await refresh_derived(touched["authors"], touched["years"])
+            # Dernière publication effectivement lue : les suivantes seront prises au prochain passage
+            if publications:
+                await save_derived_watermark(publications[-1]["_id"])
+            return {
+                "mode": "incremental",
+                "publications": len(publications),
+                "chercheurs": len(touched["authors"]),
+                "annees": sorted(touched["years"]),
+                **written,
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+    return await derive_all()
+
+# Ingestion en masse (NDJSON, CSV ou BSON) avec upserts par lots
+INGEST_FORMATS = {NDJSON_MEDIA_TYPE: "ndjson", "application/json": "ndjson", CSV_MEDIA_TYPE: "csv", BSON_MEDIA_TYPE: "bson"}
+# Séparateur des listes (auteurs, institutions...) dans une cellule CSV
+CSV_LIST_SEPARATOR = ";"
+# Nombre maximal de rejets détaillés dans le rapport (tous sont comptés)
+INGEST_REJECTS_REPORTED = 50
+
+class RejectedRecord(ValueError):
+    pass
+
+def read_records(file, fmt: str):
+    """Itère sur (numéro d'enregistrement, document ou RejectedRecord) d'un fichier binaire."""
+    if fmt == "bson":
+        number = 0
+        try:
+            for number, doc in enumerate(decode_file_iter(file), 1):
+                yield number, doc
+        except InvalidBSON as e:
+            yield number + 1, RejectedRecord(f"BSON invalide, lecture interrompue : {e}")
+    elif fmt == "csv":
+        reader = csv.DictReader(codecs.iterdecode(file, "utf-8-sig"))
+        for row in reader:
+            yield reader.line_num, {key: value for key, value in row.items() if key and value not in (None, "")}
+    else:
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                doc = json.loads(line)
+            except ValueError as e:
+                yield number, RejectedRecord(f"JSON invalide : {e}")
+                continue
+            yield number, doc if isinstance(doc, dict) else RejectedRecord("objet JSON attendu")
+
+def as_list(value, field: str) -> List[str]:
+    """Liste de chaînes sans doublons ni valeurs vides (ordre conservé)."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(CSV_LIST_SEPARATOR)
+    if not isinstance(value, list):
+        raise RejectedRecord(f"{field} : liste attendue")
+    return list(dict.fromkeys(str(item).strip() for item in value if item is not None and str(item).strip()))
+
+def as_year(value) -> Optional[int]:
+    if value in (None, ""):
+        return None
+    year = to_year(value)
+    if year is None or not 1000 <= year <= 2100:
+        raise RejectedRecord(f"annee invalide : {value!r}")
+    return year
+
+def as_count(value, field: str) -> int:
+    if value in (None, ""):
+        return 0
+    try:
+        count = int(float(value))
+    except (TypeError, ValueError):
+        raise RejectedRecord(f"{field} invalide : {value!r}")
+    if count < 0:
+        raise RejectedRecord(f"{field} invalide : {value!r}")
+    return count
+
+def as_text(value, field: str) -> str:
+    text = str(value).strip() if value is not None else ""
+    if not text:
+        raise RejectedRecord(f"{field} manquant")
+    return text
+
+def normalize_publication(record: Dict) -> Dict:
+    return {
+        "titre": as_text(record.get("titre"), "titre"),
+        "auteurs": as_list(record.get("auteurs"), "auteurs"),
+        "annee": as_year(record.get("annee")),
+        "citations": as_count(record.get("citations"), "citations"),
+        "mots_cles": as_list(record.get("mots_cles"), "mots_cles"),
+        "institutions": as_list(record.get("institutions"), "institutions"),
+    }
+
+def normalize_chercheur(record: Dict) -> Dict:
+    publications = record.get("publications") or []
+    if not isinstance(publications, list) or not all(isinstance(item, dict) for item in publications):
+        raise RejectedRecord("publications : liste d'objets attendue")
+    return {
+        "nom": as_text(record.get("nom"), "nom"),
+        "publications": [
+            {
+                "titre": as_text(item.get("titre"), "publications.titre"),
+                "annee": as_year(item.get("annee")),
+                "citations": as_count(item.get("citations"), "publications.citations"),
+            }
+            for item in publications
+        ],
+        "collaborateurs": as_list(record.get("collaborateurs"), "collaborateurs"),
+        "institutions": as_list(record.get("institutions"), "institutions"),
+    }
+
+def publication_filter(doc: Dict) -> Dict:
+    # Une publication est identifiée par son titre et son année (stockée sous plusieurs types)
+    annee = {"$in": year_variants(doc["annee"])} if doc["annee"] is not None else None
+    return {"titre": doc["titre"], "annee": annee}
+
+INGEST_TARGETS = {
+    "publications": (normalize_publication, publication_filter),
+    "chercheurs": (normalize_chercheur, lambda doc: {"nom": doc["nom"]}),
+}
+
+def reject(report: Dict, number: int, reason: str):
+    report["rejected"] += 1
+    if len(report["rejects"]) < INGEST_REJECTS_REPORTED:
+        report["rejects"].append({"enregistrement": number, "raison": reason})
+
+def next_batch(records, size: int, normalize, report: Dict) -> tuple:
+    """Lit, valide et normalise jusqu'à `size` enregistrements. Renvoie (documents, fin du flux)."""
+    docs = []
+    for number, record in records:
+        report["received"] += 1
+        if isinstance(record, RejectedRecord):
+            reject(report, number, str(record))
+            continue
+        try:
+            docs.append((number, normalize(record)))
+        except RejectedRecord as e:
+            reject(report, number, str(e))
+        if len(docs) >= size:
+            return docs, False
+    return docs, True
+
+async def write_batch(collection: str, docs: List[tuple], report: Dict, touched: Optional[Dict]) -> List:
+    """Écrit un lot par upserts ; renvoie les _id des documents insérés."""
+    _, key_filter = INGEST_TARGETS[collection]
+    # Dans un même lot, le dernier enregistrement d'une clé l'emporte
+    latest = {}
+    for number, doc in docs:
+        latest[json.dumps(key_filter(doc), sort_keys=True)] = (number, doc)
+    numbers, docs = zip(*latest.values())
+    filters = [key_filter(doc) for doc in docs]
+    if touched is not None and collection == "publications":
+        # Les anciennes valeurs comptent aussi : une modification peut retirer des paires ou des années
+        projection = {"_id": 0, "auteurs": 1, "annee": 1}
+        add_touched(touched, list(docs) + await db.publications.find({"$or": filters}, projection).to_list(None))
+    elif touched is not None:
+        touched["authors"].update(doc["nom"] for doc in docs)
+    # Même format que les documents existants : chaîne ISO 8601 (un datetime trierait à part)
+    now = datetime.now().isoformat()
+    ops = [
+        UpdateOne(key, {"$set": doc, "$setOnInsert": {"date_creation": now}}, upsert=True)
+        for key, doc in zip(filters, docs)
+    ]
+    try:
+        result = (await db[collection].bulk_write(ops, ordered=False)).bulk_api_result
+    except BulkWriteError as e:
+        result = e.details
+        for error in result["writeErrors"]:
+            reject(report, numbers[error["index"]], error["errmsg"])
+    report["upserted"] += result["nUpserted"]
+    report["modified"] += result["nModified"]
+    report["matched"] += result["nMatched"]
+    report["batches"] += 1
+    if await rollup_ready(collection):
+        changed = {doc["_id"]: doc async for doc in db[collection].find({"$or": filters})}
+        async with rollup_lock:
+            await ROLLUP_APPLY[collection](changed)
+    return [item["_id"] for item in result.get("upserted", [])]
+
+async def advance_watermark(collection: str, counter: int, inserted: List):
+    """Ajoute au watermark les documents insérés par une ingestion (déjà appliqués aux rollups).
+
+    Si une autre écriture a changé le compteur entre-temps, le watermark n'est pas touché :
+    le prochain passage du matérialiseur recalculera les rollups.
+    """
+    stored = await db.rollup_state.find_one({"_id": collection})
+    if stored is None or stored["counter"] + 1 != counter:
+        return
+    # Documents au-delà du watermark (le matérialiseur a pu compter les autres pendant l'ingestion)
+    added = [doc_id for doc_id in inserted if stored["last_id"] is None or doc_id > stored["last_id"]]
+    await save_watermark(collection, (counter, stored["count"] + len(added), max(added, default=stored["last_id"])))
+
+async def run_ingest(collection: str, file, fmt: str, batch_size: int, derive: bool = False) -> Dict:
+    started = time.perf_counter()
+    normalize, _ = INGEST_TARGETS[collection]
+    report = {
+        "collection": collection, "format": fmt, "received": 0, "upserted": 0, "modified": 0,
+        "matched": 0, "rejected": 0, "batches": 0, "rejects": [],
+    }
+    # Chercheurs et années à re-dériver, suivis seulement si la dérivation est demandée
+    touched = {"authors": set(), "years": set()} if derive else None
+    records = read_records(file, fmt)
+    inserted = []
+    try:
+        done = False
+        while not done:
+            # Lecture et validation hors de la boucle d'événements
+            docs, done = await asyncio.to_thread(next_batch, records, batch_size, normalize, report)
+            if docs:
+                inserted += await write_batch(collection, docs, report, touched)
+    finally:
+        if report["batches"]:
+            counter = await bump_version(collection)
+            if await rollup_ready(collection):
+                async with rollup_lock:
+                    await advance_watermark(collection, counter, inserted)
+                    await rollups_changed(collection)
+    if derive:
+        report["derived"] = await derive_incremental(touched)
+    elapsed = time.perf_counter() - started
+    report["seconds"] = round(elapsed, 3)
+    report["documents_per_second"] = round((report["received"] - report["rejected"]) / elapsed, 1) if elapsed else None
+    log(logging.INFO, "ingested", collection=collection, received=report["received"],
+        rejected=report["rejected"], seconds=report["seconds"])
+    return report
+
+@app.post("/api/ingest/{collection}", response_model=Dict)
+async def ingest(request: Request, collection: str,
+                 format: Optional[str] = Query(None, pattern="^(ndjson|csv|bson)$"),
+                 batch_size: int = Query(INGEST_BATCH_SIZE, ge=1, le=10000),
+                 derive: bool = False,
+                 token: dict = Depends(require_admin)):
+    """Importe un flux NDJSON, CSV ou BSON (format déduit du Content-Type ou de `format`).
+
+    Les enregistrements sont validés et normalisés puis écrits par upserts non ordonnés.
+    Avec `derive=1`, la dérivation incrémentale met ensuite à jour DERIVED_COLLECTIONS,
+    chercheurs et années touchés compris ; collaborations et stats_pays ne sont jamais modifiées.
+    """
+    if collection not in INGEST_TARGETS:
+        raise HTTPException(status_code=404, detail=f"Import impossible dans {collection}")
+    fmt = format or INGEST_FORMATS.get(request.headers.get("content-type", "").split(";")[0].strip())
+    if fmt is None:
+        raise HTTPException(status_code=415, detail="Format attendu : NDJSON, CSV ou BSON")
+    with tempfile.SpooledTemporaryFile(max_size=INGEST_SPOOL_SIZE) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        return await run_ingest(collection, spool, fmt, batch_size, derive)
+
+# Plans d'exécution des requêtes fréquentes
+def plan_stages(plan) -> List[Dict]:
+    """Aplatit un winningPlan en liste d'étapes (stage, index éventuel)."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stage = {"stage": plan["stage"]}
+            if "indexName" in plan:
+                stage["index"] = plan["indexName"]
+            stages.append(stage)
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(plan_stages(value))
+    return stages
+
+@app.get("/api/admin/query_plans", response_model=List[Dict], response_class=FastJSONResponse)
+async def get_query_plans(token: dict = Depends(require_admin)):
+    """Plan gagnant de chaque requête fréquente ; `collscan` signale un parcours complet."""
+    reports = []
+    for name, collection_name, query in HOT_QUERIES:
+        explain = await db[collection_name].find(query).explain()
+        stages = plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        reports.append({
+            "query": name,
+            "collection": collection_name,
+            "filter": query,
+            "stages": stages,
+            "collscan": any(stage["stage"] == "COLLSCAN" for stage in stages),
+        })
+    return reports
+
+@app.delete("/api/admin/token_cache", response_model=Dict)
+async def clear_token_cache(username: Optional[str] = None, token: dict = Depends(require_admin)):
+    """Invalide les tokens en cache d'un utilisateur modifié ou supprimé (ou de tous)."""
+    return {"invalidated": await invalidate_user(username)}
+
+@app.delete("/api/admin/response_cache", response_model=Dict)
+async def clear_response_cache(collection: Optional[str] = None, token: dict = Depends(require_admin)):
+    """Invalide les réponses en cache après une modification faite hors de l'API."""
+    if collection is None:
+        count = len(response_cache)
+        # Le changement de version invalide aussi les caches des autres workers
+        for name in await db.list_collection_names():
+            if name not in ("users", "data_versions"):
+                await bump_version(name)
+        response_cache.clear()
+        version_cache.clear()
+        return {"invalidated": count}
+    count = response_cache.pop_where(lambda entry: collection in entry[0])
+    await bump_version(collection)
+    return {"invalidated": count}
+
+@app.get("/api/admin/rollups", response_model=List[Dict], response_class=FastJSONResponse)
+async def get_rollup_state(token: dict = Depends(require_admin)):
+    """Watermark de chaque source des agrégats matérialisés et mode du matérialiseur."""
+    states = await db.rollup_state.find({"_id": {"$in": list(ROLLUP_SOURCES)}}).to_list(None)
+    lease = await db.rollup_state.find_one({"_id": "materializer_lease"}) or {}
+    running = lease.get("owner") is not None and lease.get("expires_at", datetime.min) > datetime.utcnow()
+    for state in states:
+        state["source"] = state.pop("_id")
+        state["last_id"] = str(state["last_id"]) if state["last_id"] else None
+        state.update({"mode": ROLLUP_MODE, "running": running, "worker": lease.get("owner")})
+    return states
+
+@app.post("/api/admin/rollups", response_model=Dict)
+async def rebuild_rollup_collections(source: Optional[str] = Query(None, pattern="^(chercheurs|publications)$"),
+                                     token: dict = Depends(require_admin)):
+    """Recalcule entièrement les agrégats matérialisés (d'une source ou de toutes)."""
+    rebuilt = {}
+    for name in [source] if source else ROLLUP_SOURCES:
+        rebuilt[name] = await rebuild_rollups(name)
+    return {"rebuilt": rebuilt}
+
+@app.post("/api/admin/derive", response_model=Dict)
+async def derive_collections(mode: str = Query("incremental", pattern="^(full|incremental)$"),
+                             token: dict = Depends(require_admin)):
+    """Dérive collaborations et stats_pays des publications dans DERIVED_COLLECTIONS.
+
+    `full` : tout recalculer. `incremental` : publications ajoutées depuis le watermark commun aux deux modes.
+    """
+    return await derive_all() if mode == "full" else await derive_incremental()
+
+@app.get("/api/admin/hashing", response_model=Dict)
+async def get_hashing_metrics(token: dict = Depends(require_admin)):
+    """Temps passé dans bcrypt (`wait_seconds_total` inclut l'attente dans la file), lu dans les métriques."""
+    calls, seconds_total = metrics.value("bcrypt_duration_seconds")
+    _, wait_seconds_total = metrics.value("bcrypt_wait_seconds")
+    return {
+        "calls": calls,
+        "rejected": metrics.value("bcrypt_rejected_total"),
+        "seconds_total": seconds_total,
+        "wait_seconds_total": wait_seconds_total,
+        "pending": hash_pending,
+        "workers": HASH_WORKERS,
+        "queue_limit": HASH_QUEUE_LIMIT,
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Exposition Prometheus (texte) : requêtes HTTP, commandes MongoDB, bcrypt et cache de réponses."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Métriques désactivées")
+    metrics.set("bcrypt_pending", hash_pending)
+    metrics.set("response_cache_entries", len(response_cache))
+    metrics.set("response_cache_bytes", response_cache.bytes)
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.post("/api/admin/indexes", response_model=Dict)
+async def provision_indexes(token: dict = Depends(require_admin)):
+    missing = await ensure_indexes()
+    return {"ok": not missing, "missing": missing}
+
 @app.get("/")
 async def root():
     return {"message": "Bienvenue sur l'API de recherche scientifique"}
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""Import en masse de publications ou de chercheurs via l'API (POST /api/ingest/{collection}).
+
+Exemples :
+    python ingest.py publications nouvelles.ndjson --username admin
+    python ingest.py chercheurs chercheurs.bson --batch-size 500
+    cat export.csv | python ingest.py publications - --format csv
+
+Le mot de passe est lu dans INGEST_PASSWORD ou demandé au terminal.
+"""
+import argparse
+import getpass
+import json
+import os
+import sys
+
+import requests
+
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv", "bson": "application/bson"}
+FORMATS_BY_EXTENSION = {".ndjson": "ndjson", ".jsonl": "ndjson", ".json": "ndjson", ".csv": "csv", ".bson": "bson"}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import en masse dans research_db_structure")
+    parser.add_argument("collection", choices=["publications", "chercheurs"])
+    parser.add_argument("path", help="fichier à importer (- pour l'entrée standard)")
+    parser.add_argument("--format", choices=sorted(CONTENT_TYPES), help="déduit de l'extension par défaut")
+    parser.add_argument("--batch-size", type=int, help="documents par bulk_write (INGEST_BATCH_SIZE côté API)")
+    parser.add_argument("--api-url", default=API_BASE_URL)
+    parser.add_argument("--username", default=os.getenv("INGEST_USERNAME"))
+    parser.add_argument("--derive", action="store_true",
+                        help="met à jour derived_collaborations et derived_stats_pays (dérivation incrémentale)")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or FORMATS_BY_EXTENSION.get(os.path.splitext(args.path)[1].lower())
+    if fmt is None:
+        parser.error("format indéterminé, précisez --format")
+    username = args.username or input("Utilisateur : ")
+    password = os.getenv("INGEST_PASSWORD") or getpass.getpass("Mot de passe : ")
+
+    session = requests.Session()
+    response = session.post(f"{args.api_url}/token", data={"username": username, "password": password}, timeout=30)
+    if response.status_code != 200:
+        print(f"Échec de l'authentification ({response.status_code}) : {response.text}", file=sys.stderr)
+        return 1
+    headers = {
+        "Authorization": f"Bearer {response.json()['access_token']}",
+        "Content-Type": CONTENT_TYPES[fmt],
+    }
+    params = {"format": fmt}
+    if args.batch_size:
+        params["batch_size"] = args.batch_size
+    if args.derive:
+        params["derive"] = 1
+
+    # Le fichier est envoyé en flux, sans être chargé en mémoire
+    stream = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+    with stream:
+        response = session.post(
+            f"{args.api_url}/api/ingest/{args.collection}",
+            params=params, data=stream, headers=headers, timeout=(3.05, None),
+        )
+    if response.status_code != 200:
+        print(f"Échec de l'import ({response.status_code}) : {response.text}", file=sys.stderr)
+        return 1
+    report = response.json()
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
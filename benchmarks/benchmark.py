@@ -0,0 +1,392 @@
+"""Benchmarks de l'API et des transformations du dashboard.
+
+Chaque mesure ajoute une ligne JSON à `--results` (par défaut results.jsonl) :
+commit, suite, échelle, scénario, p50/p99/moyenne en ms, débit et pic de RSS.
+
+    # Corpus 10x dans un mongod local, puis l'API démarrée par le benchmark
+    python corpus.py 10 --drop
+    python benchmark.py api --scale 10
+
+    # Transformations du dashboard, sans MongoDB ni API
+    python benchmark.py dashboard --scale 10 100
+
+    # Comparaison de deux commits
+    python benchmark.py compare <commit-de-base> <commit>
+"""
+import argparse
+import ast
+import json
+import os
+import platform
+import random
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+from corpus import BENCH_PASSWORD, BENCH_USERNAME, CorpusGenerator, CorpusModel
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+API_DIR = os.path.join(ROOT, "api")
+DASH_FILE = os.path.join(ROOT, "streamlit", "dash.py")
+DEFAULT_RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.jsonl")
+
+# Scénarios de l'API : (nom, méthode, chemin, paramètres)
+API_SCENARIOS = [
+    ("chercheurs_page", "GET", "/api/chercheurs", {"limit": 1000, "fields": "nom,institutions"}),
+    ("chercheurs_stream", "GET", "/api/chercheurs", {"stream": 1, "fields": "nom,institutions"}),
+    ("chercheurs_arrow", "GET", "/api/chercheurs", {"format": "arrow", "fields": "nom,publications.annee"}),
+    ("publications_filtrees", "GET", "/api/publications",
+     {"start_year": 2015, "end_year": 2020, "sort": "-citations", "limit": 100}),
+    ("stats_pays_annee", "GET", "/api/stats_pays", {"annee": 2020, "fields": "annee,pays,nombre_publications"}),
+    ("collaborations", "GET", "/api/collaborations", {"stream": 1, "fields": "chercheur1,chercheur2,poids"}),
+    ("top_articles", "GET", "/api/aggregations/top_articles", {"n": 5}),
+    ("citations_chercheurs", "GET", "/api/aggregations/citations_chercheurs", {"n": 3}),
+    ("top_pays_annee", "GET", "/api/aggregations/top_pays_annee", {"annee": 2020, "n": 5, "exclude": "France"}),
+    ("publications_auteur_annee", "GET", "/api/aggregations/publications_auteur_annee",
+     {"start_year": 2000, "end_year": 2024}),
+    ("search", "GET", "/api/search", {"q": "network", "limit": 20}),
+    ("suggest", "GET", "/api/search/suggest", {"q": "ma", "limit": 10}),
+    ("graph_layout", "GET", "/api/collaborations/layout", {}),
+    ("dashboard_bootstrap", "GET", "/api/dashboard/bootstrap", {}),
+    ("dashboard_bootstrap_dict", "GET", "/api/dashboard/bootstrap", {"encoding": "dict"}),
+]
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def peak_rss_mb(pid=None):
+    """Pic de mémoire résidente d'un processus en cours (VmHWM), ou du processus courant."""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if pid is None:
+        # ru_maxrss : Ko sous Linux, octets sous macOS
+        divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor, 1)
+    return None
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def summarize(latencies, wall):
+    return {
+        "n": len(latencies),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "throughput_per_s": round(len(latencies) / wall, 2) if wall else None,
+    }
+
+class Results:
+    def __init__(self, path, suite, scale):
+        self.path = path
+        self.common = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "suite": suite,
+            "scale": scale,
+            "python": platform.python_version(),
+            "host": platform.node(),
+        }
+
+    def record(self, scenario, **values):
+        entry = {**self.common, "scenario": scenario, **values}
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        print(f"{scenario:32} p50 {entry.get('p50_ms', '-'):>10} ms  p99 {entry.get('p99_ms', '-'):>10} ms  "
+              f"{entry.get('throughput_per_s', '-'):>8}/s  RSS {entry.get('peak_rss_mb', '-')} Mo")
+
+# Benchmark de l'API
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_api(mongo_uri, port, rollup_mode):
+    # Matérialiseur des rollups désactivé par défaut : ses recalculs en tâche de fond fausseraient les mesures
+    env = {**os.environ, "MONGO_URI": mongo_uri, "ROLLUP_MODE": rollup_mode}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api_to_db:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit("L'API s'est arrêtée au démarrage")
+        try:
+            requests.get(f"{url}/", timeout=1)
+            return process, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    sys.exit("L'API n'a pas démarré en 60s")
+
+def login(session, url, username, password):
+    response = session.post(f"{url}/token", data={"username": username, "password": password}, timeout=30)
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def run_scenario(url, headers, method, path, params, requests_count, concurrency):
+    """Envoie `requests_count` requêtes avec `concurrency` clients. Renvoie (latences, erreurs, octets, durée)."""
+    local = threading.local()
+    errors = Counter()
+    sizes = []
+
+    def send(_):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            response = session.request(method, f"{url}{path}", params=params, headers=headers, timeout=300)
+            body = response.content
+        except requests.RequestException as e:
+            errors[type(e).__name__] += 1
+            return time.perf_counter() - started
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            errors[response.status_code] += 1
+        sizes.append(len(body))
+        return elapsed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(send, range(requests_count)))
+    return latencies, errors, sizes, time.perf_counter() - started
+
+def bench_api(args):
+    process = None
+    url, pid = args.api_url, args.api_pid
+    if not url:
+        process, url = start_api(args.mongo_uri, free_port(), args.rollup_mode)
+        pid = process.pid
+    results = Results(args.results, "api", args.scale)
+    # Inconnu pour une API déjà démarrée
+    results.common["rollup_mode"] = None if args.api_url else args.rollup_mode
+    try:
+        session = requests.Session()
+        headers = login(session, url, args.username, args.password)
+        # Connexions successives : coût de bcrypt et de la recherche de l'utilisateur
+        latencies, _ = time_stage(lambda: login(session, url, args.username, args.password), args.logins)
+        results.record("login", **summarize(latencies, sum(latencies)),
+                       peak_rss_mb=peak_rss_mb(pid) if pid else None)
+        selected = set(args.scenario or [])
+        for name, method, path, params in API_SCENARIOS:
+            if selected and name not in selected:
+                continue
+            # Première requête à part : cache de réponses vide, index encore froids
+            cold, errors, sizes, _ = run_scenario(url, headers, method, path, params, 1, 1)
+            latencies, errors, sizes, wall = run_scenario(
+                url, headers, method, path, params, args.requests, args.concurrency
+            )
+            results.record(
+                name,
+                **summarize(latencies, wall),
+                cold_ms=round(cold[0] * 1000, 3),
+                concurrency=args.concurrency,
+                response_bytes=int(statistics.median(sizes)) if sizes else 0,
+                errors=dict(errors),
+                peak_rss_mb=peak_rss_mb(pid) if pid else None,
+            )
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+
+# Benchmark des transformations du dashboard, extraites de dash.py (sans Streamlit)
+DASH_TRANSFORMS = (
+    "GRAPH_LAYOUT_LARGE", "create_graph_data", "ResearchIndex", "edge_list_key", "compute_graph_layout",
+    "analyze_data", "generate_colors", "generate_sankey",
+)
+
+def load_dashboard_transforms():
+    """Exécute les définitions DASH_TRANSFORMS de dash.py, décorateurs Streamlit retirés.
+
+    dash.py est un script Streamlit : l'importer lancerait l'application.
+    """
+    import hashlib
+
+    import networkx as nx
+    import numpy as np
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    with open(DASH_FILE, encoding="utf-8") as file:
+        tree = ast.parse(file.read(), DASH_FILE)
+    nodes = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)) and node.name in DASH_TRANSFORMS:
+            node.decorator_list = []
+            nodes.append(node)
+        elif isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id in DASH_TRANSFORMS for target in node.targets
+        ):
+            nodes.append(node)
+    namespace = {
+        "pd": pd, "np": np, "nx": nx, "go": go, "json": json, "hashlib": hashlib,
+        "random": random, "Counter": Counter,
+    }
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), DASH_FILE, "exec"), namespace)
+    missing = set(DASH_TRANSFORMS) - set(namespace)
+    if missing:
+        sys.exit(f"Définitions introuvables dans dash.py : {sorted(missing)}")
+    return namespace
+
+def dashboard_inputs(scale, seed):
+    """Données telles que le dashboard les reçoit de /api/dashboard/bootstrap?encoding=dict."""
+    generator = CorpusGenerator(CorpusModel(), scale, seed)
+    names, institutions = {}, {}
+    chercheurs = [
+        {
+            "nom": names.setdefault(doc["nom"], len(names)),
+            "institutions": [institutions.setdefault(nom, len(institutions)) for nom in doc["institutions"]],
+            # Années brutes (chaîne, flottant ou None) normalisées comme bootstrap_chercheurs
+            "annees": sorted(
+                int(float(publication["annee"])) for publication in doc["publications"]
+                if publication.get("annee") is not None
+            ),
+        }
+        for doc in generator.chercheurs()
+    ]
+    collaborations = [
+        [names.setdefault(doc["chercheur1"], len(names)), names.setdefault(doc["chercheur2"], len(names)), doc["poids"]]
+        for doc in generator.collaborations()
+        if doc["poids"]
+    ]
+    return chercheurs, collaborations, list(names), list(institutions)
+
+def time_stage(func, repeat):
+    latencies = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        latencies.append(time.perf_counter() - started)
+    return latencies, result
+
+def bench_dashboard(args):
+    transforms = load_dashboard_transforms()
+    for scale in args.scale:
+        results = Results(args.results, "dashboard", scale)
+        chercheurs, collaborations, names, institutions = dashboard_inputs(scale, args.seed)
+        latencies, graph_data = time_stage(
+            lambda: transforms["create_graph_data"](collaborations, names), args.repeat
+        )
+        results.record("create_graph_data", **summarize(latencies, sum(latencies)), peak_rss_mb=peak_rss_mb())
+
+        latencies, index = time_stage(
+            lambda: transforms["ResearchIndex"](chercheurs, names, institutions, graph_data), args.repeat
+        )
+        results.record("ResearchIndex", **summarize(latencies, sum(latencies)), peak_rss_mb=peak_rss_mb())
+        transforms["research_index"] = index
+
+        latencies, edges_key = time_stage(lambda: transforms["edge_list_key"](graph_data), args.repeat)
+        results.record("edge_list_key", **summarize(latencies, sum(latencies)), peak_rss_mb=peak_rss_mb())
+
+        if args.layout:
+            latencies, _ = time_stage(
+                lambda: transforms["compute_graph_layout"](edges_key, graph_data), max(1, args.repeat // 5)
+            )
+            results.record("compute_graph_layout", **summarize(latencies, sum(latencies)), peak_rss_mb=peak_rss_mb())
+
+        # Étapes par chercheur (chaque interaction dans la page 2)
+        rng = random.Random(args.seed)
+        sample = [rng.choice(names) for _ in range(args.repeat * 10)]
+        start_year, end_year = 2010, 2020
+        latencies = []
+        for nom in sample:
+            started = time.perf_counter()
+            transforms["analyze_data"](nom, start_year, end_year)
+            latencies.append(time.perf_counter() - started)
+        results.record("analyze_data", **summarize(latencies, sum(latencies)), peak_rss_mb=peak_rss_mb())
+
+        latencies = []
+        for nom in sample:
+            started = time.perf_counter()
+            transforms["generate_sankey"](nom)
+            latencies.append(time.perf_counter() - started)
+        results.record("generate_sankey", **summarize(latencies, sum(latencies)), peak_rss_mb=peak_rss_mb())
+
+        latencies, _ = time_stage(index.institution_counts, args.repeat)
+        results.record("institution_counts", **summarize(latencies, sum(latencies)), peak_rss_mb=peak_rss_mb())
+
+# Comparaison de deux commits
+def load_results(path):
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+def compare(args):
+    latest = defaultdict(dict)
+    for entry in load_results(args.results):
+        latest[entry["commit"]][(entry["suite"], entry["scale"], entry["scenario"])] = entry
+    base, head = latest.get(args.base), latest.get(args.head)
+    if not base or not head:
+        sys.exit(f"Aucun résultat pour {args.base if not base else args.head} dans {args.results}")
+    print(f"{'suite':10} {'échelle':>7} {'scénario':32} {'p50 base':>10} {'p50':>10} {'écart':>8} {'p99 base':>10} {'p99':>10}")
+    for key in sorted(set(base) & set(head), key=str):
+        before, after = base[key], head[key]
+        if "p50_ms" not in before or "p50_ms" not in after:
+            continue
+        delta = (after["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100 if before["p50_ms"] else 0
+        print(f"{key[0]:10} {key[1]:>7} {key[2]:32} {before['p50_ms']:>10} {after['p50_ms']:>10} "
+              f"{delta:>+7.1f}% {before.get('p99_ms', '-'):>10} {after.get('p99_ms', '-'):>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de l'API et du dashboard")
+    parser.add_argument("--results", default=DEFAULT_RESULTS, help="Fichier JSON Lines des résultats")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    api = commands.add_parser("api", help="Charge les endpoints de l'API (corpus chargé par corpus.py)")
+    api.add_argument("--scale", type=int, required=True, help="Échelle du corpus chargé (enregistrée avec les résultats)")
+    api.add_argument("--api-url", help="API déjà démarrée (sinon uvicorn est lancé sur --mongo-uri)")
+    api.add_argument("--api-pid", type=int, help="PID de l'API déjà démarrée, pour mesurer son pic de RSS")
+    api.add_argument("--rollup-mode", default="off", choices=["off", "auto", "stream", "poll"],
+                     help="ROLLUP_MODE de l'API lancée par le benchmark (off : aucun matérialiseur en tâche de fond)")
+    api.add_argument("--mongo-uri", default=os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017"))
+    api.add_argument("--username", default=BENCH_USERNAME)
+    api.add_argument("--password", default=BENCH_PASSWORD)
+    api.add_argument("--requests", type=int, default=200, help="Requêtes par scénario")
+    api.add_argument("--concurrency", type=int, default=8, help="Clients simultanés")
+    api.add_argument("--logins", type=int, default=5, help="Connexions successives mesurées (bcrypt)")
+    api.add_argument("--scenario", action="append", choices=[name for name, *_ in API_SCENARIOS],
+                     help="Limite aux scénarios indiqués (répétable)")
+    api.set_defaults(run=bench_api)
+
+    dashboard = commands.add_parser("dashboard", help="Chronomètre les transformations de dash.py")
+    dashboard.add_argument("--scale", type=int, nargs="+", default=[10, 100])
+    dashboard.add_argument("--repeat", type=int, default=5)
+    dashboard.add_argument("--seed", type=int, default=42)
+    dashboard.add_argument("--no-layout", dest="layout", action="store_false",
+                           help="Sans spring_layout (long aux grandes échelles)")
+    dashboard.set_defaults(run=bench_dashboard)
+
+    compare_parser = commands.add_parser("compare", help="Compare les derniers résultats de deux commits")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.set_defaults(run=compare)
+
+    args = parser.parse_args()
+    args.run(args)
+
+if __name__ == "__main__":
+    main()
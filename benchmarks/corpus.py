@@ -0,0 +1,261 @@
+"""Générateur de corpus synthétique pour les benchmarks.
+
+Les documents ont la forme de ceux du dump (mongo-dump/research_db_structure) :
+mêmes champs, mêmes types (y compris les `annee` mélangeant flottants, chaînes
+et None) et mêmes distributions de longueurs de listes, tirées des documents
+réels. À l'échelle N, les collections contiennent N fois plus de documents que
+le dump ; `stats_pays` reste bornée par la grille pays x années (ses effectifs
+sont multipliés par N).
+
+Usage :
+    python corpus.py 10 --mongo-uri mongodb://localhost:27017 --drop
+    python corpus.py 100 --out /tmp/corpus-100   # fichiers BSON pour mongorestore
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import bson
+
+DUMP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mongo-dump", "research_db_structure")
+COLLECTIONS = ("institutions", "chercheurs", "publications", "collaborations", "stats_pays")
+DATABASE = "research_db_structure"  # nom fixé par l'API
+BATCH_SIZE = 5000
+
+# Compte créé pour les benchmarks de l'API
+BENCH_USERNAME = "bench"
+BENCH_PASSWORD = "bench"
+
+def load_dump(name):
+    with open(os.path.join(DUMP_DIR, f"{name}.bson"), "rb") as file:
+        return list(bson.decode_file_iter(file))
+
+class CorpusModel:
+    """Valeurs et distributions observées dans le dump, rééchantillonnées par le générateur."""
+
+    def __init__(self):
+        chercheurs = load_dump("chercheurs")
+        publications = load_dump("publications")
+        institutions = load_dump("institutions")
+        collaborations = load_dump("collaborations")
+        stats_pays = load_dump("stats_pays")
+        self.counts = {
+            "chercheurs": len(chercheurs),
+            "publications": len(publications),
+            "institutions": len(institutions),
+            "collaborations": len(collaborations),
+            "stats_pays": len(stats_pays),
+        }
+        names = [doc["nom"].split(" ", 1) for doc in chercheurs if " " in doc["nom"]]
+        self.first_names = [first for first, _ in names]
+        self.last_names = [last for _, last in names]
+        self.title_words = [word for doc in publications for word in doc.get("titre", "").split()]
+        self.authors = [author for doc in publications for author in doc.get("auteurs", [])]
+        self.institution_names = [doc["nom"] for doc in institutions]
+        self.institution_countries = [doc.get("pays") for doc in institutions]
+        self.institution_types = [doc.get("type") for doc in institutions]
+        self.annees = [doc.get("annee") for doc in publications]
+        # Publications imbriquées des chercheurs, sans le titre : `annee` brute (chaîne, flottant
+        # ou None) et `citations` présente ou non, tirées ensemble pour garder leur corrélation
+        self.chercheur_publications = [
+            {key: value for key, value in publication.items() if key != "titre"}
+            for doc in chercheurs for publication in doc.get("publications", [])
+        ]
+        self.citations = [doc.get("citations") for doc in publications]
+        self.keywords = [word for doc in publications for word in doc.get("mots_cles", [])]
+        self.poids = [doc.get("poids") for doc in collaborations]
+        self.stats_countries = sorted({doc["pays"] for doc in stats_pays})
+        self.stats_years = sorted({doc["annee"] for doc in stats_pays})
+        self.stats_counts = [doc.get("nombre_publications") for doc in stats_pays]
+        # Longueurs des listes imbriquées
+        self.lengths = {
+            "chercheur.publications": [len(doc.get("publications", [])) for doc in chercheurs],
+            "chercheur.collaborateurs": [len(doc.get("collaborateurs", [])) for doc in chercheurs],
+            "chercheur.institutions": [len(doc.get("institutions", [])) for doc in chercheurs],
+            "publication.auteurs": [len(doc.get("auteurs", [])) for doc in publications],
+            "publication.institutions": [len(doc.get("institutions", [])) for doc in publications],
+            "publication.mots_cles": [len(doc.get("mots_cles", [])) for doc in publications],
+            "institution.chercheurs": [len(doc.get("chercheurs", [])) for doc in institutions],
+            "institution.publications": [len(doc.get("publications", [])) for doc in institutions],
+        }
+
+class CorpusGenerator:
+    """Documents synthétiques à l'échelle `scale` (déterministes pour une graine donnée)."""
+
+    def __init__(self, model, scale, seed=42):
+        self.model = model
+        self.scale = scale
+        self.random = random.Random(seed)
+        self.created = datetime(2025, 4, 15, 20, 19, 48)
+        self.counts = {name: count * scale for name, count in model.counts.items()}
+        # Noms partagés entre collections (chercheurs des collaborations, institutions des publications)
+        self.chercheur_names = self.unique_names(self.counts["chercheurs"])
+        self.institution_names = [
+            name if copy == 0 else f"{name} ({copy + 1})"
+            for copy in range(scale)
+            for name in model.institution_names
+        ]
+
+    def unique_names(self, count):
+        names, seen = [], set()
+        while len(names) < count:
+            name = f"{self.random.choice(self.model.first_names)} {self.random.choice(self.model.last_names)}"
+            if name in seen:
+                name = f"{name} {len(names)}"
+            seen.add(name)
+            names.append(name)
+        return names
+
+    def length(self, kind):
+        return self.random.choice(self.model.lengths[kind])
+
+    def sample(self, values, kind):
+        return [self.random.choice(values) for _ in range(self.length(kind))]
+
+    def title(self):
+        return " ".join(self.random.choice(self.model.title_words) for _ in range(self.random.randint(4, 12)))
+
+    def date_creation(self):
+        return (self.created + timedelta(microseconds=self.random.randint(0, 10 ** 6))).isoformat()
+
+    def institutions(self):
+        model = self.model
+        for i, name in enumerate(self.institution_names):
+            base = i % len(model.institution_names)
+            yield {
+                "nom": name,
+                "pays": model.institution_countries[base],
+                "type": model.institution_types[base],
+                "chercheurs": self.sample(self.chercheur_names, "institution.chercheurs"),
+                "publications": [self.title() for _ in range(self.length("institution.publications"))],
+                "date_creation": self.date_creation(),
+            }
+
+    def chercheurs(self):
+        for name in self.chercheur_names:
+            yield {
+                "nom": name,
+                "publications": [
+                    {"titre": self.title(), **self.random.choice(self.model.chercheur_publications)}
+                    for _ in range(self.length("chercheur.publications"))
+                ],
+                "collaborateurs": self.sample(self.model.authors, "chercheur.collaborateurs"),
+                "institutions": self.sample(self.institution_names, "chercheur.institutions"),
+                "date_creation": self.date_creation(),
+            }
+
+    def publications(self):
+        for _ in range(self.counts["publications"]):
+            auteurs = self.sample(self.model.authors, "publication.auteurs")
+            # Une partie des auteurs sont des chercheurs suivis (noms complets)
+            if auteurs and self.random.random() < 0.3:
+                auteurs[0] = self.random.choice(self.chercheur_names)
+            yield {
+                "titre": self.title(),
+                "auteurs": auteurs,
+                "annee": self.random.choice(self.model.annees),
+                "citations": self.random.choice(self.model.citations),
+                "mots_cles": self.sample(self.model.keywords, "publication.mots_cles") if self.model.keywords else [],
+                "institutions": self.sample(self.institution_names, "publication.institutions"),
+                "date_creation": self.date_creation(),
+            }
+
+    def collaborations(self):
+        pairs = set()
+        target = min(self.counts["collaborations"], len(self.chercheur_names) * (len(self.chercheur_names) - 1) // 2)
+        while len(pairs) < target:
+            first, second = self.random.sample(self.chercheur_names, 2)
+            if (second, first) in pairs:
+                continue
+            pairs.add((first, second))
+            yield {
+                "chercheur1": first,
+                "chercheur2": second,
+                "poids": self.random.choice(self.model.poids),
+                "publications": [],
+                "premiere_collaboration": None,
+                "derniere_collaboration": None,
+                "date_creation": self.date_creation(),
+            }
+
+    def stats_pays(self):
+        model = self.model
+        grid = [(pays, annee) for pays in model.stats_countries for annee in model.stats_years]
+        for pays, annee in self.random.sample(grid, min(self.counts["stats_pays"], len(grid))):
+            yield {
+                "pays": pays,
+                "annee": annee,
+                "nombre_publications": self.random.choice(model.stats_counts) * self.scale,
+                "nombre_chercheurs": None,
+                "nombre_citations": None,
+                "principales_institutions": [],
+                "date_creation": self.date_creation(),
+            }
+
+    def documents(self, name):
+        return getattr(self, name)()
+
+def batches(documents, size=BATCH_SIZE):
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def bench_user():
+    from passlib.context import CryptContext
+
+    password = CryptContext(schemes=["bcrypt"], deprecated="auto").hash(BENCH_PASSWORD)
+    return {"username": BENCH_USERNAME, "password": password}
+
+def write_mongo(generator, mongo_uri, drop):
+    from pymongo import MongoClient
+
+    db = MongoClient(mongo_uri)[DATABASE]
+    for name in COLLECTIONS:
+        if drop:
+            db[name].drop()
+        elif db[name].estimated_document_count():
+            sys.exit(f"{DATABASE}.{name} n'est pas vide : relancer avec --drop pour la remplacer")
+        started, total = time.perf_counter(), 0
+        for batch in batches(generator.documents(name)):
+            db[name].insert_many(batch, ordered=False)
+            total += len(batch)
+        print(f"{name}: {total} documents en {time.perf_counter() - started:.1f}s")
+    db.users.replace_one({"username": BENCH_USERNAME}, bench_user(), upsert=True)
+
+def write_bson(generator, out):
+    os.makedirs(out, exist_ok=True)
+    for name in COLLECTIONS:
+        total = 0
+        with open(os.path.join(out, f"{name}.bson"), "wb") as file:
+            for document in generator.documents(name):
+                file.write(bson.encode(document))
+                total += 1
+        print(f"{name}: {total} documents")
+    with open(os.path.join(out, "users.bson"), "wb") as file:
+        file.write(bson.encode(bench_user()))
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère un corpus synthétique N fois plus grand que le dump")
+    parser.add_argument("scale", type=int, help="Facteur d'échelle (10, 100, 1000...)")
+    parser.add_argument("--mongo-uri", default=os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--out", help="Écrit des fichiers BSON (mongorestore) au lieu d'insérer dans MongoDB")
+    parser.add_argument("--drop", action="store_true", help="Remplace les collections existantes")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generator = CorpusGenerator(CorpusModel(), args.scale, args.seed)
+    if args.out:
+        write_bson(generator, args.out)
+    else:
+        write_mongo(generator, args.mongo_uri, args.drop)
+
+if __name__ == "__main__":
+    main()
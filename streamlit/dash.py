@@ -1,14 +1,25 @@
 import pandas as pd
+import numpy as np
 import json
+import os
+import hashlib
+import time
 import plotly.express as px
 import plotly.graph_objects as go
-from collections import Counter
+from collections import Counter, OrderedDict, deque
 import random
 import networkx as nx
+import pyarrow as pa
 import requests
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 import streamlit as st
 
+# Début de l'exécution du script (chaque interaction relance le script entier)
+rerun_started = time.perf_counter()
+
 st.set_page_config(layout="wide")
 
 if "login_success" not in st.session_state:
@@ -16,6 +27,29 @@ if "login_success" not in st.session_state:
 
 # API Configuration
 API_BASE_URL = "http://api:8000"  # Change this to match your FastAPI server address
+API_TIMEOUT = (3.05, 60)  # (connexion, lecture) en secondes
+# "server" : coordonnées du graphe calculées par l'API (/api/collaborations/layout)
+GRAPH_LAYOUT_SOURCE = os.getenv("GRAPH_LAYOUT_SOURCE", "local")
+GRAPH_LAYOUT_LARGE = int(os.getenv("GRAPH_LAYOUT_LARGE", "500"))  # nœuds au-delà desquels l'initialisation spectrale est utilisée
+# Profilage des étapes de rendu (activable aussi avec ?profile=1 dans l'URL)
+DASH_PROFILE = os.getenv("DASH_PROFILE", "0") == "1"
+DASH_PROFILE_HISTORY = int(os.getenv("DASH_PROFILE_HISTORY", "50"))  # exécutions conservées par session
+
+# Session HTTP partagée par le processus : connexions keep-alive réutilisées,
+# nouvelles tentatives avec backoff sur les erreurs transitoires
+@st.cache_resource
+def get_http_session():
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
 def login_page():
     st.title("Connexion")
@@ -32,9 +66,10 @@ def login_page():
             st.info(f"Tentative de connexion pour l'utilisateur: {username}")
             
             try:
-                response = requests.post(
+                response = get_http_session().post(
                     f"{API_BASE_URL}/token",
                     data={"username": username, "password": password},
+                    timeout=API_TIMEOUT,
                 )
                 
                 # Display response details for debugging
@@ -59,182 +94,408 @@ if not st.session_state.get("login_success"):
     login_page()
     st.stop()
 
+# Chronologie d'une exécution du script, affichée dans la barre latérale
+class RerunProfiler:
+    """Étapes d'une exécution : début et durée en ms depuis le début du script.
+
+    `call` chronomètre un appel (l'appel unique à /api/dashboard/bootstrap, le
+    prétraitement) ; `section` découpe le script en blocs successifs.
+    Désactivé, il n'ajoute qu'un test par étape.
+    """
+
+    def __init__(self, enabled, origin):
+        self.enabled = enabled
+        self.origin = origin
+        self.stages = []
+        self._section = None
+
+    def record(self, name, kind, started):
+        ended = time.perf_counter()
+        self.stages.append({
+            "stage": name,
+            "kind": kind,
+            "start_ms": round((started - self.origin) * 1000, 2),
+            "duration_ms": round((ended - started) * 1000, 2),
+        })
+
+    def call(self, name, func, *args):
+        if not self.enabled:
+            return func(*args)
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.record(name, "call", started)
+
+    def section(self, name=None):
+        """Termine le bloc en cours et commence `name` (None : fin du dernier bloc)."""
+        if not self.enabled:
+            return
+        if self._section:
+            self.record(self._section[0], "section", self._section[1])
+        self._section = (name, time.perf_counter()) if name else None
+
+    def summary(self):
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "page": st.session_state.get("page"),
+            "total_ms": round((time.perf_counter() - self.origin) * 1000, 2),
+            "stages": sorted(self.stages, key=lambda stage: (stage["start_ms"], -stage["duration_ms"])),
+        }
+
+profiler = RerunProfiler(DASH_PROFILE or st.query_params.get("profile") == "1", rerun_started)
+
+def render_profile():
+    run = profiler.summary()
+    history = st.session_state.setdefault("profile_history", deque(maxlen=DASH_PROFILE_HISTORY))
+    history.append(run)
+    with st.sidebar.expander(f"Profilage : {run['total_ms']:.0f} ms", expanded=True):
+        stages = run["stages"]
+        colors = {"call": "steelblue", "section": "lightgray"}
+        fig = go.Figure(go.Bar(
+            y=[stage["stage"] for stage in stages],
+            x=[stage["duration_ms"] for stage in stages],
+            base=[stage["start_ms"] for stage in stages],
+            orientation="h",
+            marker=dict(color=[colors[stage["kind"]] for stage in stages]),
+            hovertemplate="%{y}: %{x:.1f} ms<extra></extra>",
+        ))
+        fig.update_layout(
+            height=max(200, 22 * len(stages)),
+            margin=dict(l=0, r=0, t=10, b=0),
+            xaxis=dict(title="ms"),
+            yaxis=dict(autorange="reversed"),
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        st.download_button(
+            f"Exporter l'historique ({len(history)} exécutions)",
+            json.dumps(list(history), ensure_ascii=False, indent=1),
+            file_name="dash_profile.json",
+            mime="application/json",
+        )
+
 # Function to make authenticated API requests
-def api_request(endpoint):
+def auth_headers():
     if "api_token" not in st.session_state:
         st.error("Non authentifié. Veuillez vous connecter.")
         st.session_state.login_success = False
         st.rerun()
         return None
-    
-    token = st.session_state.api_token
-    headers = {"Authorization": f"Bearer {token}"}
+    return {"Authorization": f"Bearer {st.session_state.api_token}"}
+
+def handle_api_error(response):
+    if response.status_code == 401:
+        st.error("Session expirée. Veuillez vous reconnecter.")
+        st.session_state.login_success = False
+        st.rerun()
+    else:
+        st.error(f"Erreur API ({response.status_code}): {response.text}")
+
+# Réponses déjà reçues, partagées entre sessions : revalidées avec If-None-Match
+ETAG_STORE_SIZE = 256
+
+@st.cache_resource
+def get_etag_store():
+    return {}
+
+def add_if_none_match(headers, key):
+    cached = get_etag_store().get(key)
+    if cached:
+        headers["If-None-Match"] = cached[0]
+    return cached
+
+def remember_response(key, response, data):
+    etag = response.headers.get("ETag")
+    if not etag:
+        return
+    store = get_etag_store()
+    store.pop(key, None)
+    store[key] = (etag, data)
+    while len(store) > ETAG_STORE_SIZE:
+        store.pop(next(iter(store)))
+
+def api_request(endpoint, params=None):
+    headers = auth_headers()
+    if headers is None:
+        return None
+    key = (endpoint, tuple(sorted((params or {}).items())))
+    cached = add_if_none_match(headers, key)
     try:
-        response = requests.get(f"{API_BASE_URL}{endpoint}", headers=headers)
+        response = get_http_session().get(
+            f"{API_BASE_URL}{endpoint}", headers=headers, params=params, timeout=API_TIMEOUT
+        )
+        if response.status_code == 304 and cached:
+            return cached[1]
         if response.status_code == 200:
-            return response.json()
-        elif response.status_code == 401:
-            st.error("Session expirée. Veuillez vous reconnecter.")
-            st.session_state.login_success = False
-            st.rerun()
-            return None
-        else:
-            st.error(f"Erreur API ({response.status_code}): {response.text}")
-            return None
+            data = response.json()
+            remember_response(key, response, data)
+            return data
+        handle_api_error(response)
+        return None
     except requests.RequestException as e:
         st.error(f"Erreur lors de la requête API: {str(e)}")
         return None
 
-# Functions to retrieve data from API with caching
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_stats_pays_data():
-    return api_request("/api/stats_pays")
+# Lecture d'une collection au format colonnaire Arrow (tableaux imbriqués éclatés par l'API)
+def api_table(endpoint, params=None):
+    headers = auth_headers()
+    if headers is None:
+        return pd.DataFrame()
+    headers["Accept"] = "application/vnd.apache.arrow.stream"
+    key = (endpoint, tuple(sorted((params or {}).items())), "arrow")
+    cached = add_if_none_match(headers, key)
+    try:
+        response = get_http_session().get(
+            f"{API_BASE_URL}{endpoint}", headers=headers, params=params, timeout=API_TIMEOUT
+        )
+        if response.status_code == 304 and cached:
+            return cached[1]
+        if response.status_code != 200:
+            handle_api_error(response)
+            return pd.DataFrame()
+        table = pa.ipc.open_stream(response.content).read_all().to_pandas()
+        remember_response(key, response, table)
+        return table
+    except (requests.RequestException, pa.ArrowInvalid) as e:
+        st.error(f"Erreur lors de la requête API: {str(e)}")
+        return pd.DataFrame()
 
-@st.cache_data(ttl=300)
-def get_chercheurs_data():
-    return api_request("/api/chercheurs")
+# Functions to retrieve data from API with caching
+# Structure du payload de /api/dashboard/bootstrap attendue par ce dashboard
+BOOTSTRAP_FORMAT = 1
+
+# Données initiales en une requête : années du curseur, chercheurs (institutions, années
+# de publication), arêtes du graphe, top articles et top chercheurs.
+# Noms de chercheurs et d'institutions encodés par l'API (tables `dictionnaires` + indices).
+# cache_resource renvoie le même objet à chaque exécution (pas de copie), et le même objet
+# tant que l'API répond 304 ; il sert de version au prétraitement (à ne pas modifier)
+# Un échec n'est pas mis en cache : st.stop() interrompt l'exécution avant que
+# cache_resource n'enregistre le résultat, et la suivante retente la requête
+@st.cache_resource(ttl=300, show_spinner=False)  # Cache for 5 minutes
+def get_dashboard_bootstrap():
+    bootstrap = api_request("/api/dashboard/bootstrap", params={"encoding": "dict"})
+    if bootstrap is None:
+        st.stop()
+    return bootstrap
+
+@st.cache_data(ttl=300, max_entries=64)
+def get_stats_pays_year(annee):
+    # Filtre appliqué par MongoDB (index annee/pays)
+    return api_table("/api/stats_pays", {"fields": "annee,pays,nombre_publications", "annee": annee})
 
 @st.cache_data(ttl=300)
-def get_publications_data():
-    return api_request("/api/publications")
+def get_publications_par_annee_data(auteur, start_year, end_year):
+    params = {"start_year": start_year, "end_year": end_year}
+    if auteur:
+        params["auteur"] = auteur
+    return api_request("/api/aggregations/publications_auteur_annee", params=params)
 
 @st.cache_data(ttl=300)
-def get_institutions_data():
-    return api_request("/api/institutions")
+def get_top_pays_data(annee):
+    return api_request(
+        "/api/aggregations/top_pays_annee",
+        params={"annee": annee, "n": 5, "exclude": "France"},
+    )
 
-@st.cache_data(ttl=300)
-def get_collaborations_data():
-    return api_request("/api/collaborations")
+# Autocomplétion des noms de chercheurs (index de préfixes côté API)
+@st.cache_data(ttl=300, max_entries=256, show_spinner=False)
+def get_researcher_suggestions(query):
+    return api_request("/api/search/suggest", params={"q": query, "type": "chercheur", "limit": 50}) or []
 
-@st.cache_data(ttl=300)
-def get_current_user_data():
-    return api_request("/api/me")
+bootstrap = profiler.call("get_dashboard_bootstrap", get_dashboard_bootstrap)
+if bootstrap.get("format") != BOOTSTRAP_FORMAT:
+    st.error(f"Format de données non pris en charge ({bootstrap.get('format')}) : mettre à jour le dashboard ou l'API")
+    st.stop()
 
 # Affichage du nom d'utilisateur connecté
-user_data = get_current_user_data()
-if user_data:
-    st.sidebar.success(f"Connecté en tant que: {user_data.get('username', 'Utilisateur')}")
-    st.sidebar.button("Déconnexion", on_click=lambda: st.session_state.clear())
-
-# Récupération des données
-stats_pays_data = get_stats_pays_data() or []
-chercheurs_data = get_chercheurs_data() or []
-publications_data = get_publications_data() or []
-institutions_data = get_institutions_data() or []
-collaborations_data = get_collaborations_data() or []
-
-# Conversion des données pays en dataframe
-rows = []
-for entry in stats_pays_data:
-    year = entry.get("annee")
-    pays = entry.get("pays")
-    nombre_publications = entry.get("nombre_publications")
-    
+st.sidebar.success(f"Connecté en tant que: {st.session_state.get('username', 'Utilisateur')}")
+st.sidebar.button("Déconnexion", on_click=lambda: st.session_state.clear())
+
+# Conversion des données pays d'une année en dataframe
+def stats_pays_frame(annee):
+    df = get_stats_pays_year(annee).reindex(columns=["annee", "pays", "nombre_publications"]).rename(
+        columns={"annee": "year", "pays": "country", "nombre_publications": "count"}
+    )
     # Traitement spécial pour la France si nécessaire
-    if pays == "France":
-        rows.append({"year": year, "country": pays, "count": 0})
+    df.loc[df["country"] == "France", "count"] = 0
+    return df
+
+# Créer des données pour le graphe (triplets [chercheur1, chercheur2, poids] déjà filtrés par l'API)
+# `names` : table des chercheurs, chaque nom est une seule chaîne partagée par toutes ses arêtes
+def create_graph_data(collaborations_data, names):
+    return [
+        {"source": names[source], "target": names[target], "weight": weight}
+        for source, target, weight in collaborations_data
+    ]
+
+# Colonne de codes entiers -> colonne catégorielle pandas (les catégories sont la table de l'API)
+def decode_categories(frame, column, names):
+    frame[column] = pd.Categorical.from_codes(frame[column].to_numpy(dtype=int), categories=names)
+    return frame
+
+# Index par chercheur, construits une fois par chargement des données
+class ResearchIndex:
+    """Accès direct aux données d'un chercheur à partir de son nom (insensible à la casse).
+
+    Les années de publication de chaque chercheur sont triées : les requêtes
+    `start_year <= annee <= end_year` se font par recherche dichotomique.
+    """
+
+    def __init__(self, chercheurs, names, institution_names, edges):
+        self.names = names
+        self.noms = {}
+        self.institutions = {}
+        self.years = {}
+        self.edges = {}
+        for chercheur in chercheurs:
+            nom = names[chercheur["nom"]]
+            self.noms.setdefault(nom.casefold(), nom)
+            self.institutions[nom] = [institution_names[code] for code in chercheur["institutions"]]
+            if chercheur["annees"]:
+                # Années déjà triées par l'API
+                years = np.asarray(chercheur["annees"], dtype=int)
+                if nom in self.years:
+                    years = np.sort(np.concatenate([self.years[nom], years]))
+                self.years[nom] = years
+        for edge in edges:
+            self.edges.setdefault(edge["source"], []).append((edge["target"], edge["weight"]))
+            self.edges.setdefault(edge["target"], []).append((edge["source"], edge["weight"]))
+
+    def find(self, name):
+        return self.noms.get(name.casefold())
+
+    def publications_between(self, nom, start_year, end_year):
+        years = self.years.get(nom)
+        if years is None:
+            return 0
+        return int(np.searchsorted(years, end_year, side="right") - np.searchsorted(years, start_year, side="left"))
+
+    def sankey_entries(self, nom):
+        # Pour simplifier, on utilise un poids fixe par institution
+        return [{"source": nom, "target": institution, "value": 1} for institution in self.institutions.get(nom, [])]
+
+    def has_institutions(self):
+        return any(self.institutions.values())
+
+    def institution_counts(self):
+        counts = {nom: len(set(institutions)) for nom, institutions in self.institutions.items() if institutions}
+        return pd.DataFrame({
+            "professor": pd.Categorical(list(counts), categories=self.names),
+            "num_institutes": list(counts.values()),
+        })
+
+    def collaborators(self, nom):
+        return self.edges.get(nom, [])
+
+# Disposition du graphe : calculée une fois par version des arêtes et partagée entre sessions
+def edge_list_key(edges):
+    payload = json.dumps(
+        sorted((edge["source"], edge["target"], edge["weight"]) for edge in edges), ensure_ascii=False
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def compute_graph_layout(edges_key, _edges):
+    G = nx.Graph()
+    for edge in _edges:
+        G.add_edge(edge["source"], edge["target"], weight=edge["weight"])
+    if G.number_of_nodes() >= GRAPH_LAYOUT_LARGE:
+        # Grands graphes : position initiale spectrale puis 30 itérations (toujours quadratique,
+        # quelques secondes au-delà de 1000 nœuds ; calculé une fois par version des arêtes)
+        pos = nx.spring_layout(G, pos=nx.spectral_layout(G), iterations=30, seed=42)
     else:
-        rows.append({"year": year, "country": pays, "count": nombre_publications})
-
-df = pd.DataFrame(rows)
-
-# Création d'un dataframe pour les publications par chercheur
-publications_df = []
-for chercheur in chercheurs_data:
-    nom_chercheur = chercheur.get("nom")
-    for publication in chercheur.get("publications", []):
-        titre = publication.get("titre")
-        annee = publication.get("annee")
-        citations = publication.get("citations")
-        if titre and citations is not None:
-            publications_df.append({
-                "researcher": nom_chercheur,
-                "title": titre,
-                "year": annee,
-                "value of cited by": citations
-            })
-
-dashboard_df = pd.DataFrame(publications_df)
-
-# Créer un dataframe avec les dates de publication
-all_pubs = []
-for pub in publications_data:
-    annee_str = str(pub.get("annee")) if pub.get("annee") else None
-    auteurs = pub.get("auteurs", [])
-    for auteur in auteurs:
-        if annee_str:
-            date_str = f"{annee_str}-01-01"  # Utiliser le premier jour de l'année
-            all_pubs.append({
-                "customAuthorName": auteur,
-                "publicationDate_s": date_str,
-                "title": pub.get("titre"),
-                "citations": pub.get("citations")
-            })
-
-df1 = pd.DataFrame(all_pubs)
-df2 = df1.copy()  # Copie pour rester compatible avec le code original
-
-# Prétraitement des dates
-def preprocess_dates(date_str):
-    if pd.isna(date_str):
-        return None
-    if isinstance(date_str, str):
-        if len(date_str) == 4:
-            return f"{date_str}-01-01"
-        elif len(date_str) == 7:
-            return f"{date_str}-01"
-    return date_str
-
-for df_tmp in [df1, df2]:
-    if not df_tmp.empty:
-        df_tmp["publicationDate_s"] = df_tmp["publicationDate_s"].apply(preprocess_dates)
-        df_tmp["publicationDate_s"] = pd.to_datetime(df_tmp["publicationDate_s"], errors="coerce")
-        df_tmp["publicationYear"] = df_tmp["publicationDate_s"].dt.year
-        df_tmp["publicationMonth"] = df_tmp["publicationDate_s"].dt.to_period("M")
-
-# Créer des données Sankey
-def create_sankey_data():
-    sankey_data = []
-    for chercheur in chercheurs_data:
-        nom_chercheur = chercheur.get("nom")
-        institutions = chercheur.get("institutions", [])
-        for institution in institutions:
-            # Pour simplifier, on utilise un poids fixe, ou vous pourriez calculer un poids basé sur d'autres facteurs
-            sankey_data.append({
-                "source": nom_chercheur,
-                "target": institution,
-                "value": 1  # Valeur par défaut, peut être ajustée
-            })
-    return sankey_data
-
-sankey_data = create_sankey_data()
-
-# Créer des données pour le graphe
-def create_graph_data():
-    graph_data = []
-    for collab in collaborations_data:
-        source = collab.get("chercheur1")
-        target = collab.get("chercheur2")
-        weight = collab.get("poids")
-        if source and target and weight:
-            graph_data.append({
-                "source": source,
-                "target": target,
-                "weight": weight
-            })
-    return graph_data
-
-graph_data = create_graph_data()
+        pos = nx.spring_layout(G, seed=42)
+    return {
+        "nodes": [
+            {"nom": node, "x": float(pos[node][0]), "y": float(pos[node][1]), "degre": G.degree(node)}
+            for node in G.nodes()
+        ],
+        "edges": [{"source": source, "target": target} for source, target in G.edges()],
+    }
+
+@st.cache_data(ttl=300)
+def get_server_graph_layout():
+    return api_request("/api/collaborations/layout")
+
+def get_graph_layout(edges, edges_key):
+    if GRAPH_LAYOUT_SOURCE == "server":
+        layout = get_server_graph_layout()
+        if layout:
+            return layout
+    return compute_graph_layout(edges_key, edges)
+
+# Prétraitement partagé entre sessions : refait seulement quand les données chargées changent
+PREPROCESS_CACHE_ENTRIES = int(os.getenv("PREPROCESS_CACHE_ENTRIES", "2"))  # versions conservées
+
+class DashboardData:
+    """Tout ce qui ne dépend que des données chargées (pas des filtres de la barre latérale).
+
+    `version` : identité des objets renvoyés par les loaders, inchangée tant que
+    l'API répond 304. Les entrées sont gardées pour que ces identités restent uniques.
+    """
+
+    def __init__(self, inputs):
+        self.inputs = inputs
+        (bootstrap,) = inputs
+        tables = bootstrap.get("dictionnaires", {})
+        names = tables.get("chercheurs", [])
+        self.stats_years = bootstrap.get("stats_years", [])
+        self.graph_data = profiler.call(
+            "create_graph_data", create_graph_data, bootstrap.get("collaborations", []), names,
+        )
+        self.research_index = profiler.call(
+            "ResearchIndex", ResearchIndex,
+            bootstrap.get("chercheurs", []), names, tables.get("institutions", []), self.graph_data,
+        )
+        self.top_articles = decode_categories(
+            pd.DataFrame(bootstrap.get("top_articles", []), columns=["chercheur", "titre", "citations"]),
+            "chercheur", names,
+        )
+        self.top_chercheurs = decode_categories(
+            pd.DataFrame(bootstrap.get("top_chercheurs", []), columns=["chercheur", "citations"]),
+            "chercheur", names,
+        )
+        # Années de la collection publications (bornes du filtre de période)
+        self.publication_years = bootstrap.get("publication_years", [])
+        self.edges_key = edge_list_key(self.graph_data)
+        self.institution_counts = self.research_index.institution_counts()
+
+@st.cache_resource
+def get_preprocess_store():
+    return {"entries": OrderedDict(), "lock": threading.Lock()}
+
+def preprocess(*inputs):
+    version = tuple(id(value) for value in inputs)
+    store = get_preprocess_store()
+    with store["lock"]:
+        entries = store["entries"]
+        data = entries.get(version)
+        if data is None:
+            data = entries[version] = DashboardData(inputs)
+            # Éviction explicite des versions les plus anciennes
+            while len(entries) > PREPROCESS_CACHE_ENTRIES:
+                entries.popitem(last=False)
+        else:
+            entries.move_to_end(version)
+        return data
+
+dashboard = profiler.call("preprocess", preprocess, bootstrap)
+graph_data = dashboard.graph_data
+research_index = dashboard.research_index
+publication_years = dashboard.publication_years
 
 def analyze_data(professor_name, start_year, end_year):
-    universities = []
-    for chercheur in chercheurs_data:
-        if chercheur["nom"].lower() == professor_name.lower():
-            for publication in chercheur.get("publications", []):
-                publication_year = publication.get("annee")
-                if publication_year and start_year <= int(publication_year) <= end_year:
-                    universities.extend(chercheur.get("institutions", []))
-    return Counter(universities).most_common(10)
+    nom = research_index.find(professor_name)
+    if nom is None:
+        return []
+    # Chaque publication de la période compte une fois pour chaque institution du chercheur
+    publications = research_index.publications_between(nom, start_year, end_year)
+    if not publications:
+        return []
+    universities = Counter()
+    for institution in research_index.institutions[nom]:
+        universities[institution] += publications
+    return universities.most_common(10)
 
 def generate_colors(labels):
     random.seed(42)
@@ -247,9 +508,7 @@ def generate_sankey(chercheur_name):
     sources, targets, values, labels = [], [], [], []
     label_map, current_index = {}, 0
 
-    filtered_sankey = [entry for entry in sankey_data if entry["source"] == chercheur_name]
-    
-    for entry in filtered_sankey:
+    for entry in research_index.sankey_entries(chercheur_name):
         source, target, value = entry["source"], entry["target"], entry["value"]
 
         if source not in label_map:
@@ -311,8 +570,8 @@ def previous_page():
         st.session_state.page -= 1
 
 # Configuration des filtres
-if not df.empty and 'year' in df.columns:
-    years = sorted(df["year"].unique())
+if dashboard.stats_years:
+    years = dashboard.stats_years
     selected_year = st.sidebar.slider(
         "Sélectionnez une année",
         min_value=int(min(years)) if years else 2000,
@@ -324,10 +583,10 @@ else:
     selected_year = 2000
     years = [2000]
 
-if not df1.empty and 'publicationYear' in df1.columns:
-    publication_years_min = int(df1["publicationYear"].min()) if not df1["publicationYear"].isna().all() else 2000
-    publication_years_max = int(df1["publicationYear"].max()) if not df1["publicationYear"].isna().all() else 2023
-    
+if publication_years:
+    publication_years_min = publication_years[0]
+    publication_years_max = publication_years[-1]
+
     start_year, end_year = st.sidebar.slider(
         "Période de publication",
         min_value=publication_years_min,
@@ -338,31 +597,21 @@ if not df1.empty and 'publicationYear' in df1.columns:
 else:
     start_year, end_year = 2000, 2023
 
-# Traitement des données pour le dashboard
-if not dashboard_df.empty:
-    top_articles_per_researcher = (
-        dashboard_df.groupby(["researcher", "title"])["value of cited by"]
-        .sum()
-        .reset_index()
-    )
-
-    top_articles_per_researcher = top_articles_per_researcher.sort_values(
-        by=["researcher", "value of cited by"], ascending=[True, False]
-    )
-
-    top_5_articles = top_articles_per_researcher.groupby("researcher").head(5)
-
-    total_citations_per_researcher = (
-        dashboard_df.groupby("researcher")["value of cited by"].sum().reset_index()
-    )
+# Traitement des données pour le dashboard (agrégations calculées par l'API)
+profiler.section("Données du dashboard")
+DASHBOARD_COLUMNS = {"chercheur": "researcher", "titre": "title", "citations": "value of cited by"}
 
-    total_citations_per_researcher = total_citations_per_researcher.sort_values(
-        by="value of cited by", ascending=False
-    )
+top_5_articles = dashboard.top_articles.rename(columns=DASHBOARD_COLUMNS)
 
-    top_3_researchers = total_citations_per_researcher.head(3)
+if not top_5_articles.empty:
+    top_3_researchers = dashboard.top_chercheurs.rename(columns=DASHBOARD_COLUMNS)
 
     researcher_list = list(top_5_articles["researcher"].unique()) if not top_5_articles.empty else ["Aucun chercheur trouvé"]
+    researcher_query = st.sidebar.text_input("Rechercher un chercheur", placeholder="Nom ou début de nom")
+    if researcher_query.strip():
+        suggestions = profiler.call("get_researcher_suggestions", get_researcher_suggestions, researcher_query.strip())
+        matches = [suggestion["nom"] for suggestion in suggestions]
+        researcher_list = [nom for nom in matches if nom in researcher_list] or ["Aucun chercheur trouvé"]
     selected_dashboard_researcher = st.sidebar.selectbox(
         "Sélectionnez un chercheur pour le dashboard supplémentaire",
         researcher_list
@@ -386,7 +635,8 @@ st.title("        ")
 
 if st.session_state.page == 1:
     # Visualisation 1
-    filtered_df = df[df["year"] == str(selected_year)]
+    profiler.section("Visualisation 1 - carte")
+    filtered_df = profiler.call("get_stats_pays_year", stats_pays_frame, selected_year)
     if not filtered_df.empty:
         fig_map = px.choropleth(
             filtered_df,
@@ -412,8 +662,11 @@ if st.session_state.page == 1:
         st.warning(f"Aucune donnée disponible pour l'année {selected_year}")
 
     # Visualisation 2
-    if not filtered_df.empty:
-        top_5 = filtered_df.sort_values(by="count", ascending=False).head(5)
+    profiler.section("Visualisation 2 - top pays")
+    top_5 = pd.DataFrame(
+        profiler.call("get_top_pays_data", get_top_pays_data, selected_year) or [], columns=["pays", "nombre_publications"]
+    ).rename(columns={"pays": "country", "nombre_publications": "count"})
+    if not top_5.empty:
         fig_bar = px.bar(
             top_5,
             x="country",
@@ -428,25 +681,21 @@ if st.session_state.page == 1:
         st.warning(f"Aucune donnée disponible pour l'année {selected_year}")
 
     # Visualisation 6 - Graphe de collaborations
+    profiler.section("Visualisation 6 - graphe")
     if graph_data:
-        G = nx.Graph()
+        layout = profiler.call("get_graph_layout", get_graph_layout, graph_data, dashboard.edges_key)
+        nodes = layout["nodes"]
 
-        for edge in graph_data:
-            source = edge["source"]
-            target = edge["target"]
-            weight = edge["weight"]
-            G.add_edge(source, target, weight=weight)
-
-        if G.number_of_nodes() > 0:
-            pos = nx.spring_layout(G, seed=42)
-            x_nodes = [pos[node][0] for node in G.nodes()]
-            y_nodes = [pos[node][1] for node in G.nodes()]
+        if nodes:
+            pos = {node["nom"]: (node["x"], node["y"]) for node in nodes}
+            x_nodes = [node["x"] for node in nodes]
+            y_nodes = [node["y"] for node in nodes]
 
             x_edges = []
             y_edges = []
-            for edge in G.edges():
-                x_edges += [pos[edge[0]][0], pos[edge[1]][0], None]
-                y_edges += [pos[edge[0]][1], pos[edge[1]][1], None]
+            for edge in layout["edges"]:
+                x_edges += [pos[edge["source"]][0], pos[edge["target"]][0], None]
+                y_edges += [pos[edge["source"]][1], pos[edge["target"]][1], None]
 
             edge_trace = go.Scatter(
                 x=x_edges,
@@ -475,8 +724,8 @@ if st.session_state.page == 1:
                 )
             )
 
-            node_text = [f"{node}" for node in G.nodes()]
-            node_trace.marker.color = [len(list(G.neighbors(node))) for node in G.nodes()]
+            node_text = [f"{node['nom']}" for node in nodes]
+            node_trace.marker.color = [node["degre"] for node in nodes]
             node_trace.text = node_text
 
             fig_graph = go.Figure(
@@ -496,21 +745,9 @@ if st.session_state.page == 1:
         st.warning("Aucune donnée de collaboration disponible")
 
     # Visualisation 7 - Nombre d'instituts par chercheur (générale - non filtrée par utilisateur)
-    if sankey_data:
-        collab_count = {}
-
-        for entry in sankey_data:
-            source = entry["source"]
-            target = entry["target"]
-            if source not in collab_count:
-                collab_count[source] = set()
-            collab_count[source].add(target)
-
-        collab_data = [
-            {"professor": prof, "num_institutes": len(instituts)}
-            for prof, instituts in collab_count.items()
-        ]
-        collab_df = pd.DataFrame(collab_data)
+    profiler.section("Visualisation 7 - instituts")
+    if research_index.has_institutions():
+        collab_df = dashboard.institution_counts
 
         if not collab_df.empty:
             fig_collab = px.bar(
@@ -530,6 +767,7 @@ if st.session_state.page == 1:
         st.warning("Aucune donnée de collaboration disponible")
 
     # Visualisation 9 - Top 3 chercheurs par citations (générale - non filtrée par utilisateur)
+    profiler.section("Visualisation 9 - podium")
     if not top_3_researchers.empty:
         # Utilisation des données non filtrées par utilisateur pour ce graphique
         podium_fig = go.Figure()
@@ -556,6 +794,7 @@ if st.session_state.page == 1:
 
 elif st.session_state.page == 2:
     # Visualisation 8 - Articles les plus cités par chercheur
+    profiler.section("Visualisation 8 - articles")
     if not filtered_dashboard_data.empty:
         fig_dashboard = go.Figure()
 
@@ -586,17 +825,25 @@ elif st.session_state.page == 2:
         st.warning(f"Aucune donnée disponible pour {selected_dashboard_researcher}")
 
     # Visualisation 3 - Publications par année (spécifique à l'utilisateur sélectionné)
-    filtered_df1 = df1[
-        (df1["publicationYear"] >= start_year) & (df1["publicationYear"] <= end_year)
-    ]
-    if selected_dashboard_researcher != "All Researchers" and selected_dashboard_researcher != "Aucun chercheur trouvé":
-        filtered_df1 = filtered_df1[
-            filtered_df1["customAuthorName"] == selected_dashboard_researcher
-        ]
-    
-    if not filtered_df1.empty:
-        publication_count_by_year = (
-            filtered_df1.groupby("publicationYear").size().reset_index(name="count")
+    profiler.section("Visualisation 3 - publications par année")
+    researcher_selected = (
+        selected_dashboard_researcher != "All Researchers"
+        and selected_dashboard_researcher != "Aucun chercheur trouvé"
+    )
+    publications_par_annee = pd.DataFrame(
+        profiler.call(
+            "get_publications_par_annee_data", get_publications_par_annee_data,
+            selected_dashboard_researcher if researcher_selected else None, start_year, end_year,
+        ) or [],
+        columns=["auteur", "annee", "nombre"],
+    )
+
+    if not publications_par_annee.empty:
+        publication_count_by_year = profiler.call(
+            "groupby annee",
+            lambda: publications_par_annee.groupby("annee")["nombre"].sum()
+            .reset_index()
+            .rename(columns={"annee": "publicationYear", "nombre": "count"}),
         )
         fig_pub = px.bar(
             publication_count_by_year,
@@ -604,7 +851,7 @@ elif st.session_state.page == 2:
             y="count",
             title=(
                 f"Publications de {selected_dashboard_researcher}"
-                if selected_dashboard_researcher != "All Researchers" and selected_dashboard_researcher != "Aucun chercheur trouvé"
+                if researcher_selected
                 else "Publications par année"
             ),
             labels={"publicationYear": "Année", "count": "Nombre de publications"},
@@ -614,15 +861,17 @@ elif st.session_state.page == 2:
         st.warning(f"Aucune publication trouvée pour la période sélectionnée")
 
     # Diagramme Sankey (spécifique à l'utilisateur sélectionné)
-    if selected_dashboard_researcher != "Aucun chercheur trouvé" and sankey_data:
-        fig_sankey = generate_sankey(selected_dashboard_researcher)
+    profiler.section("Sankey")
+    if selected_dashboard_researcher != "Aucun chercheur trouvé" and research_index.has_institutions():
+        fig_sankey = profiler.call("generate_sankey", generate_sankey, selected_dashboard_researcher)
         st.plotly_chart(fig_sankey, use_container_width=True)
     else:
         st.warning(f"Aucune donnée de collaboration disponible pour {selected_dashboard_researcher}")
 
     # Visualisation 4 - Top Universités pour un chercheur (spécifique à l'utilisateur sélectionné)
+    profiler.section("Visualisation 4 - universités")
     if selected_dashboard_researcher != "Aucun chercheur trouvé":
-        university_counts = analyze_data(selected_dashboard_researcher, start_year, end_year)
+        university_counts = profiler.call("analyze_data", analyze_data, selected_dashboard_researcher, start_year, end_year)
         if university_counts:
             df_chart = {
                 "University": [item[0] for item in university_counts],
@@ -650,4 +899,8 @@ with col_prev:
 
 with col_next:
     if st.session_state.page < 2:
-        st.button("Page suivante →", on_click=next_page)
\ No newline at end of file
+        st.button("Page suivante →", on_click=next_page)
+
+profiler.section()
+if profiler.enabled:
+    render_profile()